@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Dataset, Equipment
+from .models import AuthToken, Dataset, Equipment, EquipmentType, IngestLog, QuarantinedRow
 
 
 @admin.register(Dataset)
@@ -9,8 +9,42 @@ class DatasetAdmin(admin.ModelAdmin):
     search_fields = ['filename']
 
 
+@admin.register(EquipmentType)
+class EquipmentTypeAdmin(admin.ModelAdmin):
+    """Types can be added but not renamed or deleted: every process caches id <-> name"""
+    list_display = ['name']
+    search_fields = ['name']
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Equipment)
 class EquipmentAdmin(admin.ModelAdmin):
-    list_display = ['equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
-    list_filter = ['equipment_type']
+    list_display = ['equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature', 'is_outlier']
+    list_filter = ['equipment_type', 'is_outlier']
     search_fields = ['equipment_name']
+
+
+@admin.register(QuarantinedRow)
+class QuarantinedRowAdmin(admin.ModelAdmin):
+    list_display = ['dataset', 'line_number', 'reasons']
+    search_fields = ['reasons']
+
+
+@admin.register(IngestLog)
+class IngestLogAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'rows', 'total_ms', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['filename']
+
+
+@admin.register(AuthToken)
+class AuthTokenAdmin(admin.ModelAdmin):
+    list_display = ['user', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['user__username']
+    readonly_fields = ['key_hash']
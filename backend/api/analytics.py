@@ -0,0 +1,133 @@
+from django.db.models import Avg, Count
+from .models import Equipment, EquipmentType
+from .serializers import DatasetSummarySerializer
+
+
+PARAMETERS = ['flowrate', 'pressure', 'temperature']
+DEFAULT_TREND_LIMIT = 50
+MAX_TREND_LIMIT = 500
+
+
+def parse_id_list(raw):
+    """Parse a comma separated ?ids= value into a list of unique integer ids"""
+    ids = []
+    for part in (raw or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        value = int(part)  # Raises ValueError on bad input
+        if value not in ids:
+            ids.append(value)
+    return ids
+
+
+def per_type_aggregates(dataset_ids):
+    """Per-dataset, per-type counts and averages from a single GROUP BY query"""
+    rows = (
+        Equipment.objects
+        .filter(dataset_id__in=dataset_ids)
+        .values('dataset_id', 'equipment_type_id')
+        .annotate(
+            count=Count('id'),
+            avg_flowrate=Avg('flowrate'),
+            avg_pressure=Avg('pressure'),
+            avg_temperature=Avg('temperature'),
+        )
+        .order_by()
+    )
+    stats = {dataset_id: {} for dataset_id in dataset_ids}
+    for row in rows:
+        type_name = EquipmentType.objects.name_for(row['equipment_type_id'])
+        stats[row['dataset_id']][type_name] = {
+            'count': row['count'],
+            'avg_flowrate': row['avg_flowrate'],
+            'avg_pressure': row['avg_pressure'],
+            'avg_temperature': row['avg_temperature'],
+        }
+    return stats
+
+
+def _delta(current, reference):
+    """Difference between two optional numbers"""
+    if current is None or reference is None:
+        return None
+    return current - reference
+
+
+def _summary_delta(current, reference):
+    """Change in the dataset-level aggregates between two summaries"""
+    delta = {'total_count': current['total_count'] - reference['total_count']}
+    for param in PARAMETERS:
+        field = f'avg_{param}'
+        delta[field] = _delta(current[field], reference[field])
+    return delta
+
+
+def _type_deltas(current, reference):
+    """Per-type change in count and averages between two per-type stat maps"""
+    deltas = {}
+    for eq_type in sorted(set(current) | set(reference)):
+        cur = current.get(eq_type, {})
+        ref = reference.get(eq_type, {})
+        deltas[eq_type] = {'count': cur.get('count', 0) - ref.get('count', 0)}
+        for param in PARAMETERS:
+            field = f'avg_{param}'
+            deltas[eq_type][field] = _delta(cur.get(field), ref.get(field))
+    return deltas
+
+
+def _summaries(datasets):
+    """Serialize dataset summaries and attach per-type statistics"""
+    summaries = DatasetSummarySerializer(datasets, many=True).data
+    type_stats = per_type_aggregates([summary['id'] for summary in summaries])
+    for summary in summaries:
+        summary['type_stats'] = type_stats[summary['id']]
+    return summaries
+
+
+def compare_datasets(datasets):
+    """Side-by-side statistics with deltas against the first dataset"""
+    summaries = _summaries(datasets)
+    baseline = summaries[0]
+    comparisons = []
+    for summary in summaries[1:]:
+        comparisons.append({
+            'id': summary['id'],
+            'summary': _summary_delta(summary, baseline),
+            'types': _type_deltas(summary['type_stats'], baseline['type_stats']),
+        })
+    return {
+        'baseline_id': baseline['id'],
+        'datasets': summaries,
+        'deltas': comparisons,
+    }
+
+
+def dataset_trend(datasets):
+    """Parameter drift across datasets in upload order"""
+    summaries = _summaries(datasets)
+    points = []
+    previous = None
+    for summary in summaries:
+        point = {
+            'id': summary['id'],
+            'filename': summary['filename'],
+            'uploaded_at': summary['uploaded_at'],
+            'total_count': summary['total_count'],
+            'type_stats': summary['type_stats'],
+            'change': None,
+        }
+        for param in PARAMETERS:
+            point[f'avg_{param}'] = summary[f'avg_{param}']
+        if previous is not None:
+            point['change'] = _summary_delta(summary, previous)
+        points.append(point)
+        previous = summary
+
+    drift = None
+    if len(summaries) > 1:
+        drift = {
+            'summary': _summary_delta(summaries[-1], summaries[0]),
+            'types': _type_deltas(summaries[-1]['type_stats'], summaries[0]['type_stats']),
+        }
+    return {'points': points, 'drift': drift}
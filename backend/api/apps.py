@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from .search import restore_fts_triggers
+        post_migrate.connect(restore_fts_triggers, sender=self)
@@ -0,0 +1,283 @@
+"""
+Async versions of the read and download endpoints, served under ASGI.
+
+Reads use the async ORM and stream large JSON bodies row chunk by row chunk.
+CPU-heavy work (CSV ingest, PDF rendering) is offloaded to the default thread
+pool executor so a slow upload or report never blocks the event loop. Other
+HTTP methods on the same URLs fall through to the DRF viewsets.
+"""
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import exceptions
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+from .export import CSVChunks, EXPORT_COLUMNS, EXPORT_FORMATS, check_format, export_file, export_row
+from .filters import filter_equipment
+from .ingest import IngestError, get_upload_file, upload_csv
+from .models import Dataset, Equipment, EquipmentType
+from .reports import build_pdf_report
+from .serializers import DatasetSummarySerializer, EquipmentSerializer
+from .views import DatasetViewSet, EquipmentViewSet
+from .writes import database_locked
+
+
+STREAM_CHUNK_SIZE = 2000  # Rows fetched and encoded per streamed chunk
+PDF_CHUNK_SIZE = 64 * 1024
+
+# EquipmentSerializer's fields, reading the type id in place of its name
+EQUIPMENT_FIELDS = [
+    'equipment_type_id' if field == 'equipment_type' else field for field in EquipmentSerializer.Meta.fields
+]
+
+dataset_detail_sync = DatasetViewSet.as_view(
+    {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}
+)
+dataset_history_sync = DatasetViewSet.as_view({'get': 'history'})
+dataset_upload_sync = DatasetViewSet.as_view({'post': 'upload'})
+dataset_pdf_sync = DatasetViewSet.as_view({'get': 'generate_pdf'})
+dataset_export_sync = DatasetViewSet.as_view({'get': 'export'})
+equipment_list_sync = EquipmentViewSet.as_view({'get': 'list'})
+
+
+def _dumps(data):
+    return json.dumps(data, cls=JSONEncoder)
+
+
+def in_executor(func):
+    """Wrap func to run on the default executor instead of the request thread.
+
+    The worker closes its database connection when done, as Django only
+    cleans up connections on the request's own thread.
+    """
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connection.close()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def csrf_exempt(view):
+    """Mark an async view CSRF exempt; Django's decorator only keeps coroutines async from 5.0"""
+    view.csrf_exempt = True
+    return view
+
+
+async def _fallback(view, request, **kwargs):
+    """Serve a request with the synchronous DRF view"""
+    return await sync_to_async(view)(request, **kwargs)
+
+
+def _not_found():
+    return JsonResponse({'detail': 'Not found.'}, status=404)
+
+
+async def _load_new_type(type_names, type_id):
+    """Reload the type_names snapshot when type_id was created by an ingest after it was taken"""
+    if type_id not in type_names:
+        type_names.update(await EquipmentType.objects.anames())
+
+
+async def _equipment_rows(queryset, type_names):
+    """Equipment rows as EquipmentSerializer-shaped dicts, fetched STREAM_CHUNK_SIZE at a time"""
+    # values() rather than values_list(): on Django 4.2 the latter's aiterator()
+    # runs its query on the event loop
+    async for row in queryset.values(*EQUIPMENT_FIELDS).aiterator(chunk_size=STREAM_CHUNK_SIZE):
+        await _load_new_type(type_names, row['equipment_type_id'])
+        row['equipment_type_id'] = type_names[row['equipment_type_id']]
+        yield dict(zip(EquipmentSerializer.Meta.fields, row.values()))
+
+
+async def _json_array(queryset, type_names):
+    """Encode a queryset as a JSON array, one chunk of STREAM_CHUNK_SIZE rows at a time"""
+    yield '['
+    chunk = []
+    separator = ''
+    async for row in _equipment_rows(queryset, type_names):
+        chunk.append(_dumps(row))
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield separator + ','.join(chunk)
+            separator = ','
+            chunk = []
+    if chunk:
+        yield separator + ','.join(chunk)
+    yield ']'
+
+
+async def _dataset_json(header, queryset, type_names):
+    """Dataset fields followed by a streamed 'equipment' array, in DatasetSerializer's shape"""
+    yield _dumps(header)[:-1] + ',"equipment":'
+    async for chunk in _json_array(queryset, type_names):
+        yield chunk
+    yield '}'
+
+
+@csrf_exempt
+async def dataset_history(request):
+    """Get last 5 uploaded datasets"""
+    if request.method != 'GET':
+        return await _fallback(dataset_history_sync, request)
+    datasets = [ds async for ds in Dataset.objects.prefetch_related('type_counts')[:5]]
+    await EquipmentType.objects.anames()  # Serializing type counts then needs no queries
+    return JsonResponse(DatasetSummarySerializer(datasets, many=True).data, safe=False, encoder=JSONEncoder)
+
+
+@csrf_exempt
+async def dataset_detail(request, pk):
+    """Dataset with its equipment rows streamed from the database"""
+    if request.method != 'GET':
+        return await _fallback(dataset_detail_sync, request, pk=pk)
+    try:
+        dataset = await Dataset.objects.prefetch_related('type_counts').aget(pk=pk)
+    except Dataset.DoesNotExist:
+        return _not_found()
+    type_names = await EquipmentType.objects.anames()
+    header = DatasetSummarySerializer(dataset).data
+
+    equipment = Equipment.objects.filter(dataset=dataset).order_by('id')
+    if request.GET.get('outliers') == 'only':
+        equipment = equipment.filter(is_outlier=True)
+    return StreamingHttpResponse(
+        _dataset_json(header, equipment, type_names), content_type='application/json'
+    )
+
+
+@csrf_exempt
+async def equipment_list(request):
+    """Query equipment across datasets; streams the whole result unless ?limit= is given"""
+    if request.method != 'GET':
+        return await _fallback(equipment_list_sync, request)
+    try:
+        queryset = await sync_to_async(filter_equipment)(Equipment.objects.all(), request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    type_names = await EquipmentType.objects.anames()
+
+    # Reuse DRF's limit/offset parsing and link building for the paginated case
+    paginator = LimitOffsetPagination()
+    paginator.request = Request(request)
+    paginator.limit = paginator.get_limit(paginator.request)
+    if paginator.limit is None:
+        return StreamingHttpResponse(_json_array(queryset, type_names), content_type='application/json')
+
+    paginator.offset = paginator.get_offset(paginator.request)
+    paginator.count = await queryset.acount()
+    page = queryset[paginator.offset:paginator.offset + paginator.limit]
+    return JsonResponse({
+        'count': paginator.count,
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': [row async for row in _equipment_rows(page, type_names)],
+    }, encoder=JSONEncoder)
+
+
+async def _buffer_chunks(buffer):
+    """Read a file-like object in PDF_CHUNK_SIZE chunks, closing it at the end"""
+    try:
+        while chunk := buffer.read(PDF_CHUNK_SIZE):
+            yield chunk
+    finally:
+        buffer.close()
+
+
+@csrf_exempt
+async def dataset_pdf(request, pk):
+    """Render the PDF report on the executor and stream it back"""
+    if request.method != 'GET':
+        return await _fallback(dataset_pdf_sync, request, pk=pk)
+    try:
+        dataset = await Dataset.objects.aget(pk=pk)
+    except Dataset.DoesNotExist:
+        return _not_found()
+    buffer = await in_executor(build_pdf_report)(dataset)
+    response = StreamingHttpResponse(_buffer_chunks(buffer), content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="equipment_report_{dataset.id}.pdf"'
+    return response
+
+
+async def _csv_export(queryset, type_names):
+    chunks = CSVChunks()
+    async for row in queryset.values(*EXPORT_COLUMNS).aiterator(chunk_size=STREAM_CHUNK_SIZE):
+        await _load_new_type(type_names, row['equipment_type_id'])
+        chunk = chunks.add(export_row(row.values(), type_names.__getitem__))
+        if chunk:
+            yield chunk
+    yield chunks.flush()
+
+
+@csrf_exempt
+async def dataset_export(request, pk):
+    """Stream a CSV export from the database, or write Parquet/XLSX on the executor"""
+    if request.method != 'GET':
+        return await _fallback(dataset_export_sync, request, pk=pk)
+    try:
+        dataset = await Dataset.objects.aget(pk=pk)
+    except Dataset.DoesNotExist:
+        return _not_found()
+    export_format = request.GET.get('format', 'csv')
+    try:
+        check_format(export_format)
+        queryset = await sync_to_async(filter_equipment)(Equipment.objects.filter(dataset=dataset), request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    if export_format == 'csv':
+        content = _csv_export(queryset, await EquipmentType.objects.anames())
+    else:
+        content = _buffer_chunks(await in_executor(export_file)(queryset, export_format))
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="equipment_{dataset.id}.{export_format}"'
+    return response
+
+
+def _authenticate(request):
+    """Authenticate like DatasetViewSet: token, then session with DRF's CSRF check.
+
+    Returns the user or None for anonymous requests; raises APIException when
+    credentials are given but rejected.
+    """
+    user = Request(
+        request,
+        parsers=[parser() for parser in DatasetViewSet.parser_classes],  # The CSRF check reads the form
+        authenticators=[auth() for auth in DatasetViewSet.authentication_classes],
+    ).user
+    return user if user.is_authenticated else None
+
+
+def _upload(request, user, profile_dir):
+    file = get_upload_file(request.FILES)  # Parses the multipart body
+    return upload_csv(file, user, profile_dir)
+
+
+@csrf_exempt
+async def dataset_upload(request):
+    """Handle CSV file upload; parsing and ingest run on the executor"""
+    if request.method != 'POST':
+        return await _fallback(dataset_upload_sync, request)
+    try:
+        user = await sync_to_async(_authenticate)(request)
+    except exceptions.APIException as e:
+        response = JsonResponse({'detail': str(e.detail)}, status=e.status_code)
+        if isinstance(e, (exceptions.AuthenticationFailed, exceptions.NotAuthenticated)):
+            response['WWW-Authenticate'] = DatasetViewSet.authentication_classes[0]().authenticate_header(request)
+        return response
+
+    profile_dir = settings.INGEST_PROFILE_DIR if request.GET.get('profile') == '1' else None
+    try:
+        data, timer = await in_executor(_upload)(request, user, profile_dir)
+    except IngestError as e:
+        return JsonResponse(e.as_dict(), status=400)
+    except Exception as e:
+        if not database_locked(e):
+            return JsonResponse({'error': str(e)}, status=400)
+        response = JsonResponse({'error': str(e)}, status=503)
+        response['Retry-After'] = str(settings.WRITE_RETRY_AFTER)
+        return response
+
+    response = JsonResponse(data, status=201, encoder=JSONEncoder)
+    response['Server-Timing'] = timer.server_timing()
+    return response
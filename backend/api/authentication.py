@@ -0,0 +1,98 @@
+import hashlib
+import secrets
+import threading
+import time
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import authentication, exceptions
+from .models import AuthToken
+from .writes import write_transaction
+
+
+_cache = {}  # token hash -> (user, expires at in time.monotonic() seconds)
+_cache_lock = threading.Lock()
+
+
+def hash_token(key):
+    """Tokens are random and long, so a single SHA-256 is enough (no PBKDF2 per request)"""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def issue_token(user):
+    """Create a token for user and return the raw key; only its hash is stored.
+
+    The user's expired tokens are deleted in the same transaction.
+    """
+    key = secrets.token_urlsafe(32)
+
+    def store():
+        if settings.AUTH_TOKEN_MAX_AGE is not None:
+            AuthToken.objects.filter(user=user, created_at__lt=timezone.now() - settings.AUTH_TOKEN_MAX_AGE).delete()
+        AuthToken.objects.create(user=user, key_hash=hash_token(key))
+
+    write_transaction(store)
+    return key
+
+
+def revoke_token(key):
+    """Delete a token. Other worker processes may accept it until their cache TTL expires."""
+    key_hash = hash_token(key)
+    write_transaction(AuthToken.objects.filter(key_hash=key_hash).delete)
+    with _cache_lock:
+        _cache.pop(key_hash, None)
+
+
+def clear_token_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def _token_expired(token):
+    max_age = settings.AUTH_TOKEN_MAX_AGE
+    return max_age is not None and token.created_at + max_age < timezone.now()
+
+
+class TokenAuthentication(authentication.BaseAuthentication):
+    """Authenticate 'Authorization: Token <key>' headers against hashed tokens.
+
+    Successful lookups are cached in memory for AUTH_TOKEN_CACHE_TTL seconds.
+    """
+    keyword = 'Token'
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            key = header[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        return self.authenticate_credentials(key)
+
+    def authenticate_credentials(self, key):
+        key_hash = hash_token(key)
+        now = time.monotonic()
+        with _cache_lock:
+            cached = _cache.get(key_hash)
+        if cached and cached[1] > now:
+            return cached[0], key
+
+        token = AuthToken.objects.select_related('user').filter(key_hash=key_hash).first()
+        if token is None or _token_expired(token):
+            raise exceptions.AuthenticationFailed('Invalid or expired token.')
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        ttl = settings.AUTH_TOKEN_CACHE_TTL
+        if settings.AUTH_TOKEN_MAX_AGE is not None:
+            # Don't cache a token past its expiry
+            remaining = token.created_at + settings.AUTH_TOKEN_MAX_AGE - timezone.now()
+            ttl = min(ttl, remaining.total_seconds())
+        with _cache_lock:
+            _cache[key_hash] = (token.user, now + ttl)
+        return token.user, key
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,155 @@
+import csv
+import io
+import tempfile
+from .models import EquipmentType
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+EXPORT_CHUNK_SIZE = 5000  # Rows fetched per query and written per chunk/row group
+
+# Equipment field -> column header; the first five match the upload format so
+# an export can be uploaded again
+EXPORT_COLUMNS = {
+    'equipment_name': 'Equipment Name',
+    'equipment_type_id': 'Type',
+    'flowrate': 'Flowrate',
+    'pressure': 'Pressure',
+    'temperature': 'Temperature',
+    'flowrate_outlier': 'Flowrate Outlier',
+    'pressure_outlier': 'Pressure Outlier',
+    'temperature_outlier': 'Temperature Outlier',
+    'is_outlier': 'Is Outlier',
+}
+TYPE_POSITION = list(EXPORT_COLUMNS).index('equipment_type_id')
+
+EXPORT_FORMATS = {  # ?format= value (also the file extension) -> content type
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def check_format(export_format):
+    """Raise ValueError with a user facing message when a format can't be exported"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'format must be one of: {", ".join(EXPORT_FORMATS)}')
+    if export_format == 'parquet' and pyarrow is None:
+        raise ValueError('Parquet export requires pyarrow to be installed')
+    if export_format == 'xlsx' and openpyxl is None:
+        raise ValueError('XLSX export requires openpyxl to be installed')
+
+
+def export_row(values, type_name=EquipmentType.objects.name_for):
+    """Values of EXPORT_COLUMNS with the type id replaced by its name"""
+    row = list(values)
+    row[TYPE_POSITION] = type_name(row[TYPE_POSITION])
+    return row
+
+
+def export_rows(queryset):
+    """Rows for export, streamed from the cursor EXPORT_CHUNK_SIZE at a time"""
+    for row in queryset.values_list(*EXPORT_COLUMNS).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield export_row(row)
+
+
+class CSVChunks:
+    """Encode rows as CSV text, one chunk of EXPORT_CHUNK_SIZE rows at a time"""
+    def __init__(self):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.rows = 0
+        self.writer.writerow(EXPORT_COLUMNS.values())
+
+    def add(self, row):
+        """Buffer a row; returns a chunk of CSV text when one is full, else None"""
+        self.writer.writerow(row)
+        self.rows += 1
+        if self.rows % EXPORT_CHUNK_SIZE == 0:
+            return self.flush()
+        return None
+
+    def flush(self):
+        chunk = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return chunk
+
+
+def csv_chunks(queryset):
+    """Generator of CSV text chunks for a StreamingHttpResponse"""
+    chunks = CSVChunks()
+    for row in export_rows(queryset):
+        chunk = chunks.add(row)
+        if chunk:
+            yield chunk
+    yield chunks.flush()
+
+
+PARQUET_TYPES = {
+    'equipment_name': 'string',
+    'equipment_type_id': 'string',
+    'flowrate': 'float64',
+    'pressure': 'float64',
+    'temperature': 'float64',
+    'flowrate_outlier': 'bool',
+    'pressure_outlier': 'bool',
+    'temperature_outlier': 'bool',
+    'is_outlier': 'bool',
+}
+
+
+def _parquet_table(batch, schema):
+    columns = list(zip(*batch)) if batch else [[] for _ in schema.names]
+    return pyarrow.Table.from_arrays(
+        [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema,
+    )
+
+
+def _write_parquet(rows, file):
+    schema = pyarrow.schema([
+        (header, pyarrow.type_for_alias(PARQUET_TYPES[field])) for field, header in EXPORT_COLUMNS.items()
+    ])
+    with pyarrow.parquet.ParquetWriter(file, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == EXPORT_CHUNK_SIZE:
+                writer.write_table(_parquet_table(batch, schema))
+                batch = []
+        if batch:
+            writer.write_table(_parquet_table(batch, schema))
+
+
+def _write_xlsx(rows, file):
+    workbook = openpyxl.Workbook(write_only=True)  # Streams rows to disk instead of keeping cells
+    sheet = workbook.create_sheet('Equipment')
+    sheet.append(list(EXPORT_COLUMNS.values()))
+    for row in rows:
+        sheet.append(row)
+    workbook.save(file)
+
+
+def export_file(queryset, export_format):
+    """Write a binary export (parquet or xlsx) to a temporary file, rewound for reading.
+
+    The file is deleted when closed.
+    """
+    file = tempfile.NamedTemporaryFile(suffix=f'.{export_format}')
+    writer = _write_parquet if export_format == 'parquet' else _write_xlsx
+    try:
+        writer(export_rows(queryset), file)
+    except Exception:
+        file.close()
+        raise
+    file.seek(0)
+    return file
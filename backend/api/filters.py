@@ -0,0 +1,77 @@
+from .models import Equipment, EquipmentType
+
+
+RANGE_FIELDS = ['flowrate', 'pressure', 'temperature']
+ORDERING_FIELDS = ['id', 'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
+ORDERING_LOOKUPS = {'equipment_type': 'equipment_type__name'}
+
+# (query params, index the planner is expected to use); ?dataset= is added per check
+PLAN_CHECKS = [
+    ({'min_flowrate': '100'}, 'equipment_dataset_flow_idx'),
+    ({'min_pressure': '40'}, 'equipment_dataset_press_idx'),
+    ({'min_temperature': '80', 'max_temperature': '120'}, 'equipment_dataset_temp_idx'),
+]
+
+
+def _parse_float(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a number')
+
+
+def parse_ordering(raw):
+    """Validate a comma separated ?ordering= value against the allowed fields"""
+    ordering = []
+    for field in (raw or '').split(','):
+        field = field.strip()
+        if not field:
+            continue
+        if field.lstrip('-') not in ORDERING_FIELDS:
+            raise ValueError(f'ordering must be one of: {", ".join(ORDERING_FIELDS)}')
+        name = field.lstrip('-')
+        ordering.append(field.replace(name, ORDERING_LOOKUPS.get(name, name)))
+    return ordering
+
+
+def filter_equipment(queryset, params):
+    """Apply type, min/max range, outlier and ordering query params to an equipment queryset.
+
+    Raises ValueError with a user facing message on invalid parameters.
+    """
+    dataset = params.get('dataset')
+    if dataset:
+        try:
+            queryset = queryset.filter(dataset_id=int(dataset))
+        except ValueError:
+            raise ValueError('dataset must be an integer')
+
+    equipment_type = params.get('type')
+    if equipment_type:
+        type_id = EquipmentType.objects.id_for(equipment_type)
+        queryset = queryset.filter(equipment_type_id=type_id) if type_id else queryset.none()
+
+    for field in RANGE_FIELDS:
+        minimum = _parse_float(params, f'min_{field}')
+        maximum = _parse_float(params, f'max_{field}')
+        if minimum is not None:
+            queryset = queryset.filter(**{f'{field}__gte': minimum})
+        if maximum is not None:
+            queryset = queryset.filter(**{f'{field}__lte': maximum})
+
+    if params.get('outliers') == 'only':
+        queryset = queryset.filter(is_outlier=True)
+
+    ordering = parse_ordering(params.get('ordering'))
+    return queryset.order_by(*(ordering or ['id']))
+
+
+def query_plans(dataset_id):
+    """Yield (query string, expected index, EXPLAIN QUERY PLAN output) for each PLAN_CHECKS entry"""
+    for params, index in PLAN_CHECKS:
+        params = {'dataset': str(dataset_id), **params}
+        plan = filter_equipment(Equipment.objects.all(), params).explain()
+        yield '&'.join(f'{key}={value}' for key, value in params.items()), index, plan
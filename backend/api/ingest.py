@@ -0,0 +1,370 @@
+import cProfile
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .models import Dataset, Equipment, EquipmentType, IngestLog, QuarantinedRow, Reading, ReadingRollup
+from .outliers import detect_outliers, outlier_counts
+from .readings import compute_rollups, latest_readings, reading_rows, rollup_rows
+from .schema import IngestSchema, record_lines
+from .serializers import DatasetSerializer, DatasetSummarySerializer
+from .validation import validate_rows, rejected_rows
+from .writes import write_transaction
+
+
+MAX_DATASETS = 5
+INSERT_BATCH_SIZE = 5000
+
+
+class IngestError(Exception):
+    """Problem with the uploaded file that should be reported to the client"""
+    def __init__(self, message, validation=None):
+        super().__init__(message)
+        self.validation = validation
+    
+    def as_dict(self):
+        error = {'error': str(self)}
+        if self.validation:
+            error['validation'] = self.validation
+        return error
+
+
+class StageTimer:
+    """Collect wall-clock duration and row counts for each ingest stage"""
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Time the enclosed block; the yielded dict's 'rows' may be set inside it"""
+        record = {'name': name, 'rows': rows}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['duration_ms'] = (time.perf_counter() - start) * 1000
+            if record['rows'] and record['duration_ms'] > 0:
+                record['rows_per_second'] = record['rows'] / (record['duration_ms'] / 1000)
+            else:
+                record['rows_per_second'] = None
+            self.stages.append(record)
+
+    @property
+    def total_ms(self):
+        return sum(stage['duration_ms'] for stage in self.stages)
+
+    def server_timing(self):
+        """Format stages as a Server-Timing header value"""
+        entries = [f'{stage["name"]};dur={stage["duration_ms"]:.2f}' for stage in self.stages]
+        entries.append(f'total;dur={self.total_ms:.2f}')
+        return ', '.join(entries)
+
+    def as_dict(self):
+        return {'total_ms': self.total_ms, 'stages': self.stages}
+
+
+@contextmanager
+def profiled(directory, label):
+    """Dump a cProfile of the enclosed block to <directory>/<label>-<timestamp>.prof.
+
+    Yields the output path, or None when directory is falsy and profiling is off.
+    """
+    if not directory:
+        yield None
+        return
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{label}-{datetime.now().strftime("%Y%m%d-%H%M%S-%f")}.prof')
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def prune_datasets(keep=MAX_DATASETS):
+    """Keep only the most recent `keep` datasets"""
+    datasets = Dataset.objects.all()
+    if datasets.count() > keep:
+        datasets_to_delete = datasets[keep:]
+        for ds in datasets_to_delete:
+            ds.delete()
+
+
+def _type_ids(types):
+    """Integer EquipmentType ids for a Series of type names"""
+    codes, names = pd.factorize(types)
+    ids = EquipmentType.objects.ids_for([str(name) for name in names])
+    return np.array([ids[str(name)] for name in names], dtype=np.int64)[codes]
+
+
+def _equipment_rows(dataset, df, type_ids, flags):
+    """Build Equipment instances for df in INSERT_BATCH_SIZE chunks"""
+    columns = [
+        df['Equipment Name'].astype(object).tolist(),
+        type_ids.tolist(),
+        df['Flowrate'].tolist(),
+        df['Pressure'].tolist(),
+        df['Temperature'].tolist(),
+        flags['flowrate_outlier'].tolist(),
+        flags['pressure_outlier'].tolist(),
+        flags['temperature_outlier'].tolist(),
+        flags['is_outlier'].tolist(),
+    ]
+    for start in range(0, len(df), INSERT_BATCH_SIZE):
+        yield [
+            Equipment(
+                dataset=dataset,
+                equipment_name=name,
+                equipment_type_id=type_id,
+                flowrate=flowrate,
+                pressure=pressure,
+                temperature=temperature,
+                flowrate_outlier=flowrate_outlier,
+                pressure_outlier=pressure_outlier,
+                temperature_outlier=temperature_outlier,
+                is_outlier=is_outlier,
+            )
+            for name, type_id, flowrate, pressure, temperature,
+                flowrate_outlier, pressure_outlier, temperature_outlier, is_outlier
+            in zip(*(column[start:start + INSERT_BATCH_SIZE] for column in columns))
+        ]
+
+
+def _read_rows(file, timer, schema):
+    """Header, parse and validate stages.
+
+    Returns (accepted rows, ValidationResult, validation summary, quarantine rows).
+    """
+    with timer.stage('header'):
+        try:
+            resolved = schema.read_header(file)
+        except ValueError as e:
+            raise IngestError(str(e))
+
+    with timer.stage('parse') as stage:
+        df, unparsed, malformed = schema.read_csv(file, resolved)
+        stage['rows'] = len(df)
+
+    with timer.stage('validate', rows=len(df)):
+        result = validate_rows(df, schema, unparsed, malformed)
+        validation = result.summary()
+        if not result.accepted:
+            raise IngestError('CSV contains no valid rows', validation)
+        quarantine = []
+        if result.rejected:
+            lines = record_lines(file, validation['total_rows'])
+            quarantine = list(rejected_rows(df, result, unparsed, lines))
+            df = df[result.valid].reset_index(drop=True)
+            if isinstance(df['Type'].dtype, pd.CategoricalDtype):
+                df['Type'] = df['Type'].cat.remove_unused_categories()
+    return df, result, validation, quarantine
+
+
+def _summarize(df, timer):
+    """Stats and outlier stages over the accepted rows.
+
+    Returns (per-parameter sums, type distribution, type ids, outlier flags).
+    """
+    with timer.stage('stats', rows=len(df)):
+        sums = {
+            'flowrate': float(df['Flowrate'].sum()),
+            'pressure': float(df['Pressure'].sum()),
+            'temperature': float(df['Temperature'].sum()),
+        }
+        type_distribution = {str(k): int(v) for k, v in df['Type'].value_counts().items() if v}
+        type_ids = _type_ids(df['Type'])
+
+    with timer.stage('outliers', rows=len(df)):
+        # Flag per-type outliers in one vectorized pass
+        flags = detect_outliers(df)
+    return sums, type_distribution, type_ids, flags
+
+
+def _quarantine(dataset, quarantine, timer, rows):
+    with timer.stage('quarantine', rows=rows):
+        QuarantinedRow.objects.bulk_create(
+            (
+                QuarantinedRow(
+                    dataset=dataset,
+                    line_number=line_number,
+                    reasons=','.join(reasons),
+                    data=json.dumps(values, default=str),
+                )
+                for line_number, reasons, values in quarantine
+            ),
+            batch_size=INSERT_BATCH_SIZE,
+        )
+
+
+def _write(store, timer, filename, rows):
+    """Run store in a write transaction, keeping only the stages timed by its last attempt.
+
+    The run's IngestLog is written in the same transaction, so a stored
+    dataset always has its log and a failed log write stores nothing.
+    """
+    mark = len(timer.stages)
+
+    def attempt():
+        del timer.stages[mark:]  # Drop the stages of an attempt that was rolled back
+        dataset = store()
+        _log_ingest(dataset, filename, rows, timer)
+        return dataset
+    return write_transaction(attempt)
+
+
+def _store_readings(dataset, readings, timer):
+    """Insert timestamped readings and their precomputed rollups"""
+    equipment_ids = dict(dataset.equipment.values_list('equipment_name', 'id'))
+    with timer.stage('readings', rows=len(readings)):
+        for batch in reading_rows(dataset, readings, equipment_ids, INSERT_BATCH_SIZE):
+            Reading.objects.bulk_create(batch)
+
+    with timer.stage('rollups', rows=len(readings)):
+        rollups = compute_rollups(readings, equipment_ids)
+        for batch in rollup_rows(dataset, rollups, INSERT_BATCH_SIZE):
+            ReadingRollup.objects.bulk_create(batch)
+
+
+def ingest_csv(file, user, timer, schema=None):
+    """Parse, validate, summarize and store an uploaded CSV as a new Dataset.
+
+    Rows that fail validation are stored as QuarantinedRow records instead of
+    failing the whole upload. When the file has a timestamp column every row
+    is stored as a Reading (with 1m/1h/1d rollups) and the dataset's equipment
+    rows hold each equipment's latest reading. Returns (dataset, validation
+    summary dict).
+    """
+    df, result, validation, quarantine = _read_rows(file, timer, schema or IngestSchema())
+    readings = None
+    if 'Timestamp' in df:
+        readings, df = df, latest_readings(df)
+    total_count = len(df)
+    sums, type_distribution, type_ids, flags = _summarize(df, timer)
+    param_outlier_counts, total_outliers = outlier_counts(flags)
+
+    def store():
+        with timer.stage('insert', rows=total_count):
+            dataset = Dataset.objects.create(
+                user=user,
+                filename=file.name,
+                total_count=total_count,
+                avg_flowrate=sums['flowrate'] / total_count,
+                avg_pressure=sums['pressure'] / total_count,
+                avg_temperature=sums['temperature'] / total_count,
+                sum_flowrate=sums['flowrate'],
+                sum_pressure=sums['pressure'],
+                sum_temperature=sums['temperature'],
+                outlier_count=total_outliers,
+                rejected_count=result.rejected,
+            )
+            dataset.set_outlier_counts(param_outlier_counts)
+            dataset.save()
+            dataset.set_type_distribution(type_distribution)
+
+            for batch in _equipment_rows(dataset, df, type_ids, flags):
+                Equipment.objects.bulk_create(batch)
+
+        if readings is not None:
+            _store_readings(dataset, readings, timer)
+        _quarantine(dataset, quarantine, timer, result.rejected)
+
+        with timer.stage('prune'):
+            prune_datasets()
+        return dataset
+
+    # One transaction, so a failed upload leaves nothing behind and concurrent
+    # uploads never prune a half-stored dataset
+    return _write(store, timer, file.name, validation['accepted']), validation
+
+
+def append_csv(dataset, file, timer, schema=None):
+    """Add the rows of an uploaded CSV to an existing Dataset.
+
+    Only the new rows are read: the count, averages, type distribution and
+    outlier counts are updated from the stored running sums and counts.
+    Outliers and duplicate names are checked within the appended file, as
+    re-scoring existing rows would mean rescanning them. Returns
+    (dataset, validation summary dict).
+    """
+    df, result, validation, quarantine = _read_rows(file, timer, schema or IngestSchema())
+    if 'Timestamp' in df:
+        raise IngestError('Timestamped readings cannot be appended; upload them as a new dataset')
+    new_count = len(df)
+    sums, type_distribution, type_ids, flags = _summarize(df, timer)
+    param_outlier_counts, total_outliers = outlier_counts(flags)
+
+    def store():
+        nonlocal dataset
+        with timer.stage('insert', rows=new_count):
+            dataset = Dataset.objects.select_for_update().get(pk=dataset.pk)
+            dataset.total_count += new_count
+            for param, total in sums.items():
+                running = getattr(dataset, f'sum_{param}') + total
+                setattr(dataset, f'sum_{param}', running)
+                setattr(dataset, f'avg_{param}', running / dataset.total_count)
+            dataset.outlier_count += total_outliers
+            stored = dataset.get_outlier_counts()
+            dataset.set_outlier_counts({
+                param: stored.get(param, 0) + count for param, count in param_outlier_counts.items()
+            })
+            dataset.rejected_count += result.rejected
+            dataset.save()
+            dataset.add_type_counts(type_distribution)
+
+            for batch in _equipment_rows(dataset, df, type_ids, flags):
+                Equipment.objects.bulk_create(batch)
+
+        _quarantine(dataset, quarantine, timer, result.rejected)
+        return dataset
+
+    return _write(store, timer, file.name, validation['accepted']), validation
+
+
+def _log_ingest(dataset, filename, rows, timer):
+    """Store the stage timings so far; serialization runs after the transaction commits"""
+    log = IngestLog(dataset=dataset, filename=filename, rows=rows, total_ms=timer.total_ms)
+    log.set_stages(timer.stages)
+    log.save()
+
+
+def get_upload_file(files):
+    """Return the uploaded CSV from request.FILES"""
+    if 'file' not in files:
+        raise IngestError('No file provided')
+    file = files['file']
+    
+    # Validate file extension
+    if not file.name.endswith('.csv'):
+        raise IngestError('File must be a CSV')
+    return file
+
+
+def upload_csv(file, user, profile_dir=None, dataset=None):
+    """Ingest an uploaded CSV as a new dataset, or append it to `dataset`,
+    and serialize the result with its stage timings.
+
+    Returns (response data, StageTimer). With profile_dir set, a cProfile of
+    the run is written there.
+    """
+    timer = StageTimer()
+    with profiled(profile_dir, 'append' if dataset else 'upload') as profile_path:
+        if dataset is None:
+            dataset, validation = ingest_csv(file, user, timer)
+            with timer.stage('serialize', rows=dataset.total_count):
+                data = DatasetSerializer(dataset).data
+        else:
+            dataset, validation = append_csv(dataset, file, timer)
+            with timer.stage('serialize'):
+                # Summary only; re-serializing every existing row would defeat the append
+                data = DatasetSummarySerializer(dataset).data
+    
+    data['validation'] = validation
+    data['ingest'] = timer.as_dict()
+    if profile_path:
+        data['ingest']['profile'] = os.path.basename(profile_path)
+    return data, timer
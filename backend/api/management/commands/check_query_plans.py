@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.filters import query_plans
+
+
+class Command(BaseCommand):
+    help = 'Verify that equipment filter queries are served by their indexes (EXPLAIN QUERY PLAN)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', type=int, default=1, help='dataset id to filter on')
+
+    def handle(self, *args, **options):
+        failures = []
+        for query, index, plan in query_plans(options['dataset']):
+            if index in plan:
+                self.stdout.write(f'OK    {query} -> {index}')
+            else:
+                failures.append(query)
+                self.stdout.write(f'FAIL  {query} -> expected {index}\n{plan}')
+
+        if failures:
+            raise CommandError(f'{len(failures)} query plan check(s) did not use the expected index')
+        self.stdout.write(self.style.SUCCESS('All equipment filter queries use their indexes'))
@@ -0,0 +1,57 @@
+import os
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest,
+)
+from prometheus_client import multiprocess
+
+
+# With PROMETHEUS_MULTIPROC_DIR set (before the workers start), each process
+# writes its samples to mmap files in that directory and the metrics view
+# aggregates across all of them.
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+LABELS = ['method', 'route']
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500, 1000)
+
+REQUESTS = Counter(
+    'api_requests_total', 'Requests by route and status', LABELS + ['status'],
+)
+LATENCY = Histogram(
+    'api_request_duration_seconds', 'Request latency by route', LABELS,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+REQUEST_SIZE = Histogram(
+    'api_request_size_bytes', 'Request body size by route', LABELS, buckets=SIZE_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    'api_response_size_bytes', 'Response body size by route', LABELS, buckets=SIZE_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'api_db_queries', 'SQL queries issued per request', LABELS, buckets=QUERY_BUCKETS,
+)
+DB_TIME = Histogram(
+    'api_db_query_duration_seconds', 'Total SQL time per request', LABELS,
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 10),
+)
+
+
+def observe(method, route, status, duration, request_size, response_size, query_count, query_time):
+    """Record one finished request"""
+    REQUESTS.labels(method, route, str(status)).inc()
+    LATENCY.labels(method, route).observe(duration)
+    REQUEST_SIZE.labels(method, route).observe(request_size)
+    if response_size is not None:
+        RESPONSE_SIZE.labels(method, route).observe(response_size)
+    DB_QUERIES.labels(method, route).observe(query_count)
+    DB_TIME.labels(method, route).observe(query_time)
+
+
+def render():
+    """Return (body, content_type) in Prometheus text exposition format"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,114 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connection
+from . import metrics
+
+
+class QueryCounter:
+    """connection.execute_wrapper hook that counts and times SQL queries"""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+def _add_wrapper(wrapper):
+    connection.execute_wrappers.append(wrapper)
+
+
+def _remove_wrapper(wrapper):
+    connection.execute_wrappers.remove(wrapper)
+
+
+def _counted(content, done):
+    """Pass a streamed body through, calling done(size in bytes) when it closes"""
+    size = 0
+    try:
+        for chunk in content:
+            size += len(chunk)
+            yield chunk
+    finally:
+        done(size)
+
+
+async def _acounted(content, done):
+    size = 0
+    try:
+        async for chunk in content:
+            size += len(chunk)
+            yield chunk
+    finally:
+        done(size)
+
+
+class MetricsMiddleware:
+    """Record per-route latency, payload sizes and DB query count/time.
+
+    Works in both the WSGI and ASGI request paths so async views are not
+    forced back onto a thread. Under ASGI, queries made by work offloaded to
+    an executor (ingest, PDF rendering) are not counted. Streamed responses
+    are recorded when their body closes; queries made while streaming are
+    not counted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        queries = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start, queries)
+        return response
+
+    async def __acall__(self, request):
+        queries = QueryCounter()
+        start = time.perf_counter()
+        # Connections are per thread: async ORM calls run on the request's
+        # sync thread, so the wrapper is installed there
+        await sync_to_async(_add_wrapper)(queries)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_remove_wrapper)(queries)
+        self.observe(request, response, time.perf_counter() - start, queries)
+        return response
+
+    def observe(self, request, response, duration, queries):
+        # View names keep label cardinality bounded (no ids in labels)
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        try:
+            request_size = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            request_size = 0
+
+        def record(response_size):
+            metrics.observe(
+                request.method, route, response.status_code, duration,
+                request_size, response_size, queries.count, queries.duration,
+            )
+
+        if not response.streaming:
+            record(len(response.content))
+        elif response.has_header('Content-Length'):  # e.g. FileResponse; keeps file_to_stream intact
+            record(int(response['Content-Length']))
+        else:
+            # Generated bodies are only sized once they have been sent
+            counted = _acounted if response.is_async else _counted
+            response.streaming_content = counted(response.streaming_content, record)
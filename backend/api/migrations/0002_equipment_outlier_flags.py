@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='outlier_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='outlier_counts',
+            field=models.TextField(default='{}'),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='flowrate_outlier',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='is_outlier',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='pressure_outlier',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='temperature_outlier',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['dataset', 'is_outlier'], name='equipment_dataset_outlier_idx'),
+        ),
+    ]
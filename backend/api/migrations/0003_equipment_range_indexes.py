@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_equipment_outlier_flags'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['dataset', 'flowrate'], name='equipment_dataset_flow_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['dataset', 'pressure'], name='equipment_dataset_press_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['dataset', 'temperature'], name='equipment_dataset_temp_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:40
+
+from django.db import migrations
+
+
+def create_fts(apps, schema_editor):
+    from api.search import install_fts
+    install_fts(schema_editor.connection)
+
+
+def drop_fts(apps, schema_editor):
+    from api.search import uninstall_fts
+    uninstall_fts(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_equipment_range_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_equipment_name_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('filename', models.CharField(max_length=255)),
+                ('rows', models.IntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0.0)),
+                ('stages', models.TextField(default='[]')),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingest_logs', to='api.dataset')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_ingestlog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='rejected_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='QuarantinedRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line_number', models.IntegerField()),
+                ('reasons', models.CharField(max_length=255)),
+                ('data', models.TextField(default='{}')),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quarantined_rows', to='api.dataset')),
+            ],
+            options={
+                'ordering': ['dataset', 'line_number'],
+            },
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:30
+
+import json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_equipment_types(apps, schema_editor):
+    EquipmentType = apps.get_model('api', 'EquipmentType')
+    Equipment = apps.get_model('api', 'Equipment')
+    names = Equipment.objects.values_list('equipment_type', flat=True).distinct()
+    for name in names:
+        equipment_type, _ = EquipmentType.objects.get_or_create(name=name)
+        Equipment.objects.filter(equipment_type=name).update(type_ref=equipment_type)
+
+
+def restore_equipment_type_names(apps, schema_editor):
+    EquipmentType = apps.get_model('api', 'EquipmentType')
+    Equipment = apps.get_model('api', 'Equipment')
+    for equipment_type in EquipmentType.objects.all():
+        Equipment.objects.filter(type_ref=equipment_type).update(equipment_type=equipment_type.name)
+
+
+def fill_type_counts(apps, schema_editor):
+    Dataset = apps.get_model('api', 'Dataset')
+    EquipmentType = apps.get_model('api', 'EquipmentType')
+    DatasetTypeCount = apps.get_model('api', 'DatasetTypeCount')
+    for dataset in Dataset.objects.all():
+        try:
+            distribution = json.loads(dataset.type_distribution)
+        except ValueError:
+            distribution = {}
+        for name, count in distribution.items():
+            equipment_type, _ = EquipmentType.objects.get_or_create(name=name)
+            DatasetTypeCount.objects.create(dataset=dataset, equipment_type=equipment_type, count=count)
+
+
+def restore_type_distribution(apps, schema_editor):
+    Dataset = apps.get_model('api', 'Dataset')
+    for dataset in Dataset.objects.all():
+        counts = dataset.type_counts.order_by('-count').values_list('equipment_type__name', 'count')
+        dataset.type_distribution = json.dumps(dict(counts))
+        dataset.save(update_fields=['type_distribution'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_quarantined_rows'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='type_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='api.equipmenttype'),
+        ),
+        migrations.RunPython(fill_equipment_types, restore_equipment_type_names),
+        # Give the old column a default so this migration can be reversed
+        migrations.AlterField(
+            model_name='equipment',
+            name='equipment_type',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.RemoveField(
+            model_name='equipment',
+            name='equipment_type',
+        ),
+        migrations.RenameField(
+            model_name='equipment',
+            old_name='type_ref',
+            new_name='equipment_type',
+        ),
+        migrations.AlterField(
+            model_name='equipment',
+            name='equipment_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='equipment', to='api.equipmenttype'),
+        ),
+        migrations.CreateModel(
+            name='DatasetTypeCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='type_counts', to='api.dataset')),
+                ('equipment_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='api.equipmenttype')),
+            ],
+            options={
+                'ordering': ['-count', 'equipment_type_id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='datasettypecount',
+            constraint=models.UniqueConstraint(fields=('dataset', 'equipment_type'), name='unique_dataset_type_count'),
+        ),
+        migrations.RunPython(fill_type_counts, restore_type_distribution),
+        migrations.RemoveField(
+            model_name='dataset',
+            name='type_distribution',
+        ),
+    ]
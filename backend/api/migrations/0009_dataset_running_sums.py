@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:20
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_running_sums(apps, schema_editor):
+    Dataset = apps.get_model('api', 'Dataset')
+    Dataset.objects.update(
+        sum_flowrate=F('avg_flowrate') * F('total_count'),
+        sum_pressure=F('avg_pressure') * F('total_count'),
+        sum_temperature=F('avg_temperature') * F('total_count'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_authtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='sum_flowrate',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='sum_pressure',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='sum_temperature',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(fill_running_sums, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_dataset_running_sums'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1m', '1 minute'), ('1h', '1 hour'), ('1d', '1 day')], max_length=2)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.IntegerField()),
+                ('flowrate_min', models.FloatField()),
+                ('flowrate_max', models.FloatField()),
+                ('flowrate_mean', models.FloatField()),
+                ('pressure_min', models.FloatField()),
+                ('pressure_max', models.FloatField()),
+                ('pressure_mean', models.FloatField()),
+                ('temperature_min', models.FloatField()),
+                ('temperature_max', models.FloatField()),
+                ('temperature_mean', models.FloatField()),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reading_rollups', to='api.dataset')),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reading_rollups', to='api.equipment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dataset', 'equipment', 'resolution', 'bucket'], name='rollup_series_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Reading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('flowrate', models.FloatField()),
+                ('pressure', models.FloatField()),
+                ('temperature', models.FloatField()),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='readings', to='api.dataset')),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='readings', to='api.equipment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dataset', 'equipment', 'timestamp'], name='reading_series_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_readings'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reading',
+            name='equipment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='readings', to='api.equipment'),
+        ),
+        migrations.AlterField(
+            model_name='readingrollup',
+            name='equipment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='reading_rollups', to='api.equipment'),
+        ),
+    ]
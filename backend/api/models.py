@@ -1,6 +1,63 @@
 from django.db import models
 from django.contrib.auth.models import User
 import json
+from .writes import write_transaction
+
+
+class EquipmentTypeManager(models.Manager):
+    """Types are never renamed or deleted (the admin is read-only), so id <-> name lookups are cached per process"""
+    _ids = {}
+    _names = {}
+    
+    def ids_for(self, names):
+        """Return {name: id} for names, creating missing types"""
+        missing = [name for name in names if name not in self._ids]
+        if missing:
+            write_transaction(self.bulk_create, [self.model(name=name) for name in missing], ignore_conflicts=True)
+            for type_id, name in self.filter(name__in=missing).values_list('id', 'name'):
+                self._remember(type_id, name)
+        return {name: self._ids[name] for name in names}
+    
+    def id_for(self, name):
+        """Return the id of an existing type, or None"""
+        if name not in self._ids:
+            type_id = self.filter(name=name).values_list('id', flat=True).first()
+            if type_id is None:
+                return None
+            self._remember(type_id, name)
+        return self._ids[name]
+    
+    def name_for(self, type_id):
+        if type_id not in self._names:
+            self._remember(type_id, self.get(pk=type_id).name)
+        return self._names[type_id]
+    
+    async def anames(self):
+        """Load every type into the cache without blocking the event loop; returns {id: name}"""
+        async for type_id, name in self.values_list('id', 'name'):
+            self._remember(type_id, name)
+        return dict(self._names)
+    
+    def _remember(self, type_id, name):
+        self._ids[name] = type_id
+        self._names[type_id] = name
+    
+    def clear_cache(self):
+        self._ids.clear()
+        self._names.clear()
+
+
+class EquipmentType(models.Model):
+    """Lookup table of equipment type names"""
+    name = models.CharField(max_length=100, unique=True)
+    
+    objects = EquipmentTypeManager()
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
 
 
 class Dataset(models.Model):
@@ -12,7 +69,13 @@ class Dataset(models.Model):
     avg_flowrate = models.FloatField(default=0.0)
     avg_pressure = models.FloatField(default=0.0)
     avg_temperature = models.FloatField(default=0.0)
-    type_distribution = models.TextField(default='{}')  # Store as JSON string
+    # Running sums behind the averages, so appends update them without rescanning rows
+    sum_flowrate = models.FloatField(default=0.0)
+    sum_pressure = models.FloatField(default=0.0)
+    sum_temperature = models.FloatField(default=0.0)
+    outlier_count = models.IntegerField(default=0)
+    outlier_counts = models.TextField(default='{}')  # Per-parameter counts as JSON string
+    rejected_count = models.IntegerField(default=0)
     
     class Meta:
         ordering = ['-uploaded_at']
@@ -21,25 +84,191 @@ class Dataset(models.Model):
         return f"{self.filename} - {self.uploaded_at.strftime('%Y-%m-%d %H:%M')}"
     
     def get_type_distribution(self):
-        """Return type distribution as dictionary"""
+        """Return type distribution as dictionary, largest count first"""
+        return {
+            EquipmentType.objects.name_for(tc.equipment_type_id): tc.count
+            for tc in self.type_counts.all()
+        }
+    
+    def set_type_distribution(self, distribution_dict):
+        """Replace the stored type counts from a {type name: count} dictionary"""
+        type_ids = EquipmentType.objects.ids_for(list(distribution_dict))
+        self.type_counts.all().delete()
+        DatasetTypeCount.objects.bulk_create([
+            DatasetTypeCount(dataset=self, equipment_type_id=type_ids[name], count=count)
+            for name, count in distribution_dict.items()
+        ])
+    
+    def add_type_counts(self, distribution_dict):
+        """Add a {type name: count} dictionary to the stored type counts"""
+        type_ids = EquipmentType.objects.ids_for(list(distribution_dict))
+        existing = set(
+            self.type_counts.filter(equipment_type_id__in=type_ids.values())
+            .values_list('equipment_type_id', flat=True)
+        )
+        new = []
+        for name, count in distribution_dict.items():
+            if type_ids[name] in existing:
+                self.type_counts.filter(equipment_type_id=type_ids[name]).update(count=models.F('count') + count)
+            else:
+                new.append(DatasetTypeCount(dataset=self, equipment_type_id=type_ids[name], count=count))
+        DatasetTypeCount.objects.bulk_create(new)
+    
+    def get_outlier_counts(self):
+        """Return per-parameter outlier counts as dictionary"""
         try:
-            return json.loads(self.type_distribution)
+            return json.loads(self.outlier_counts)
         except:
             return {}
     
-    def set_type_distribution(self, distribution_dict):
-        """Set type distribution from dictionary"""
-        self.type_distribution = json.dumps(distribution_dict)
+    def set_outlier_counts(self, counts_dict):
+        """Set per-parameter outlier counts from dictionary"""
+        self.outlier_counts = json.dumps(counts_dict)
 
 
 class Equipment(models.Model):
     """Model to store individual equipment records"""
     dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='equipment')
     equipment_name = models.CharField(max_length=255)
-    equipment_type = models.CharField(max_length=100)
+    equipment_type = models.ForeignKey(EquipmentType, on_delete=models.PROTECT, related_name='equipment')
+    flowrate = models.FloatField()
+    pressure = models.FloatField()
+    temperature = models.FloatField()
+    flowrate_outlier = models.BooleanField(default=False)
+    pressure_outlier = models.BooleanField(default=False)
+    temperature_outlier = models.BooleanField(default=False)
+    is_outlier = models.BooleanField(default=False)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['dataset', 'is_outlier'], name='equipment_dataset_outlier_idx'),
+            models.Index(fields=['dataset', 'flowrate'], name='equipment_dataset_flow_idx'),
+            models.Index(fields=['dataset', 'pressure'], name='equipment_dataset_press_idx'),
+            models.Index(fields=['dataset', 'temperature'], name='equipment_dataset_temp_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.equipment_name} ({self.type_name})"
+    
+    @property
+    def type_name(self):
+        return EquipmentType.objects.name_for(self.equipment_type_id)
+
+
+class DatasetTypeCount(models.Model):
+    """Number of equipment rows of each type in a dataset"""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='type_counts')
+    equipment_type = models.ForeignKey(EquipmentType, on_delete=models.PROTECT)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-count', 'equipment_type_id']
+        constraints = [
+            models.UniqueConstraint(fields=['dataset', 'equipment_type'], name='unique_dataset_type_count'),
+        ]
+
+
+class QuarantinedRow(models.Model):
+    """Uploaded row rejected by validation, kept with its reason codes"""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='quarantined_rows')
+    line_number = models.IntegerField()  # Line in the uploaded CSV, header is line 1
+    reasons = models.CharField(max_length=255)  # Comma separated reason codes
+    data = models.TextField(default='{}')  # Raw values as JSON string
+    
+    class Meta:
+        ordering = ['dataset', 'line_number']
+    
+    def __str__(self):
+        return f"Line {self.line_number}: {self.reasons}"
+    
+    def get_data(self):
+        """Return raw row values as dictionary"""
+        try:
+            return json.loads(self.data)
+        except:
+            return {}
+
+
+class IngestLog(models.Model):
+    """Per-stage timings of one ingest run"""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='ingest_logs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    filename = models.CharField(max_length=255)
+    rows = models.IntegerField(default=0)
+    total_ms = models.FloatField(default=0.0)
+    stages = models.TextField(default='[]')  # Store as JSON string
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.filename} - {self.rows} rows in {self.total_ms:.0f} ms"
+    
+    def get_stages(self):
+        """Return stage timings as a list of dictionaries"""
+        try:
+            return json.loads(self.stages)
+        except:
+            return []
+    
+    def set_stages(self, stages_list):
+        """Set stage timings from a list of dictionaries"""
+        self.stages = json.dumps(stages_list)
+
+
+class AuthToken(models.Model):
+    """API token; only the SHA-256 hash of the key is stored"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='auth_tokens')
+    key_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Token for {self.user.username}"
+
+
+class Reading(models.Model):
+    """Timestamped reading of one equipment, from files with a timestamp column"""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='readings')
+    # Deleted with their dataset; cascading from equipment too would stop Django
+    # fast-deleting a dataset's equipment rows
+    equipment = models.ForeignKey(Equipment, on_delete=models.DO_NOTHING, related_name='readings')
+    timestamp = models.DateTimeField()
     flowrate = models.FloatField()
     pressure = models.FloatField()
     temperature = models.FloatField()
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['dataset', 'equipment', 'timestamp'], name='reading_series_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.equipment_id} @ {self.timestamp.isoformat()}"
+
+
+class ReadingRollup(models.Model):
+    """Min/max/mean of an equipment's readings over one time bucket"""
+    RESOLUTIONS = [('1m', '1 minute'), ('1h', '1 hour'), ('1d', '1 day')]
+    
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='reading_rollups')
+    equipment = models.ForeignKey(Equipment, on_delete=models.DO_NOTHING, related_name='reading_rollups')
+    resolution = models.CharField(max_length=2, choices=RESOLUTIONS)
+    bucket = models.DateTimeField()  # Start of the bucket
+    count = models.IntegerField()
+    flowrate_min = models.FloatField()
+    flowrate_max = models.FloatField()
+    flowrate_mean = models.FloatField()
+    pressure_min = models.FloatField()
+    pressure_max = models.FloatField()
+    pressure_mean = models.FloatField()
+    temperature_min = models.FloatField()
+    temperature_max = models.FloatField()
+    temperature_mean = models.FloatField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['dataset', 'equipment', 'resolution', 'bucket'], name='rollup_series_idx'),
+        ]
+    
     def __str__(self):
-        return f"{self.equipment_name} ({self.equipment_type})"
+        return f"{self.equipment_id} {self.resolution} @ {self.bucket.isoformat()}"
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+
+# CSV column -> Equipment field prefix
+OUTLIER_COLUMNS = {
+    'Flowrate': 'flowrate',
+    'Pressure': 'pressure',
+    'Temperature': 'temperature',
+}
+Z_THRESHOLD = 3.0
+IQR_FACTOR = 1.5
+
+
+def detect_outliers(df, type_column='Type'):
+    """Flag per-type outliers by z-score or IQR fences for each parameter.
+
+    Returns a dict mapping ``<field>_outlier`` to a boolean array plus an
+    ``is_outlier`` array that is true when any parameter is flagged.
+    """
+    columns = list(OUTLIER_COLUMNS)
+    values = df[columns].to_numpy(dtype=np.float64)
+    codes, uniques = pd.factorize(df[type_column], use_na_sentinel=False)
+    n_types = len(uniques)
+
+    # Per-type mean and population std via bincount, broadcast back to rows
+    counts = np.bincount(codes, minlength=n_types).astype(np.float64)[:, None]
+    sums = np.stack([np.bincount(codes, weights=values[:, i], minlength=n_types)
+                     for i in range(values.shape[1])], axis=1)
+    means = sums / counts
+    deviations = values - means[codes]
+    sq_sums = np.stack([np.bincount(codes, weights=deviations[:, i] ** 2, minlength=n_types)
+                        for i in range(values.shape[1])], axis=1)
+    stds = np.sqrt(sq_sums / counts)[codes]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_scores = np.where(stds > 0, np.abs(deviations) / stds, 0.0)
+
+    # Per-type quartiles, broadcast back to rows
+    grouped = pd.DataFrame(values, columns=columns).groupby(codes)
+    q1 = grouped.quantile(0.25).to_numpy()[codes]
+    q3 = grouped.quantile(0.75).to_numpy()[codes]
+    iqr = q3 - q1
+    outside_fences = (values < q1 - IQR_FACTOR * iqr) | (values > q3 + IQR_FACTOR * iqr)
+
+    flagged = (z_scores > Z_THRESHOLD) | outside_fences
+    flags = {f'{field}_outlier': flagged[:, i] for i, field in enumerate(OUTLIER_COLUMNS.values())}
+    flags['is_outlier'] = flagged.any(axis=1)
+    return flags
+
+
+def outlier_counts(flags):
+    """Summarize outlier flags into per-parameter and total counts"""
+    counts = {field: int(flags[f'{field}_outlier'].sum()) for field in OUTLIER_COLUMNS.values()}
+    return counts, int(flags['is_outlier'].sum())
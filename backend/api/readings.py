@@ -0,0 +1,161 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+import pandas as pd
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import Reading, ReadingRollup
+
+
+# CSV column -> Reading field
+READING_COLUMNS = {
+    'Flowrate': 'flowrate',
+    'Pressure': 'pressure',
+    'Temperature': 'temperature',
+}
+RAW = 'raw'
+ROLLUPS = {  # Finest first; each level is computed from the previous one
+    '1m': timedelta(minutes=1),
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1),
+}
+RESOLUTIONS = [RAW, *ROLLUPS]
+DEFAULT_POINTS = 1000
+MAX_POINTS = 10000
+
+
+def latest_readings(df):
+    """One row per equipment name: its most recent reading, in file order"""
+    latest = df.sort_values('Timestamp', kind='stable').drop_duplicates('Equipment Name', keep='last')
+    latest = latest.sort_index().reset_index(drop=True)
+    if isinstance(latest['Type'].dtype, pd.CategoricalDtype):
+        latest['Type'] = latest['Type'].cat.remove_unused_categories()
+    return latest
+
+
+def reading_rows(dataset, df, equipment_ids, batch_size):
+    """Build Reading instances for df in batch_size chunks.
+
+    equipment_ids maps equipment names to Equipment ids in the dataset.
+    """
+    columns = [
+        df['Equipment Name'].astype(object).map(equipment_ids).tolist(),
+        df['Timestamp'].astype(object).tolist(),  # Timestamps are datetime subclasses
+        *(df[column].tolist() for column in READING_COLUMNS),
+    ]
+    for start in range(0, len(df), batch_size):
+        yield [
+            Reading(
+                dataset=dataset,
+                equipment_id=equipment_id,
+                timestamp=timestamp,
+                flowrate=flowrate,
+                pressure=pressure,
+                temperature=temperature,
+            )
+            for equipment_id, timestamp, flowrate, pressure, temperature
+            in zip(*(column[start:start + batch_size] for column in columns))
+        ]
+
+
+def compute_rollups(df, equipment_ids):
+    """Per-equipment min/max/mean/count over each ROLLUPS bucket width.
+
+    Returns {resolution: DataFrame} with equipment_id, bucket, count and
+    <field>_min/_max/_sum columns. Coarser levels aggregate the finer level
+    rather than the raw readings.
+    """
+    level = pd.DataFrame({
+        'equipment_id': df['Equipment Name'].astype(object).map(equipment_ids).to_numpy(),
+        'bucket': df['Timestamp'],
+        'count': 1,
+    })
+    aggregations = {'count': ('count', 'sum')}
+    for column, field in READING_COLUMNS.items():
+        for stat in ('min', 'max', 'sum'):
+            level[f'{field}_{stat}'] = df[column].to_numpy()
+            aggregations[f'{field}_{stat}'] = (f'{field}_{stat}', stat)
+
+    rollups = {}
+    for resolution, width in ROLLUPS.items():
+        level = level.assign(bucket=level['bucket'].dt.floor(pd.Timedelta(width)))
+        level = level.groupby(['equipment_id', 'bucket'], sort=False).agg(**aggregations).reset_index()
+        rollups[resolution] = level
+    return rollups
+
+
+def rollup_rows(dataset, rollups, batch_size):
+    """Build ReadingRollup instances from compute_rollups() output in batch_size chunks"""
+    for resolution, frame in rollups.items():
+        counts = frame['count'].to_numpy()
+        columns = {
+            'equipment_id': frame['equipment_id'].tolist(),
+            'bucket': frame['bucket'].astype(object).tolist(),
+            'count': counts.tolist(),
+        }
+        for field in READING_COLUMNS.values():
+            columns[f'{field}_min'] = frame[f'{field}_min'].tolist()
+            columns[f'{field}_max'] = frame[f'{field}_max'].tolist()
+            columns[f'{field}_mean'] = (frame[f'{field}_sum'].to_numpy() / counts).tolist()
+        names = list(columns)
+        for start in range(0, len(frame), batch_size):
+            yield [
+                ReadingRollup(dataset=dataset, resolution=resolution, **dict(zip(names, values)))
+                for values in zip(*(columns[name][start:start + batch_size] for name in names))
+            ]
+
+
+def parse_time(value, name):
+    """Parse an ISO 8601 date or datetime query param; naive values are UTC"""
+    if value in (None, ''):
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(f'{name} must be an ISO 8601 date or datetime')
+        parsed = datetime.combine(date, time.min)
+    if timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def series_queryset(dataset_id, equipment_id, resolution, start=None, end=None):
+    """Readings or rollup buckets of one equipment overlapping [start, end], oldest first"""
+    if resolution == RAW:
+        queryset = Reading.objects.filter(dataset_id=dataset_id, equipment_id=equipment_id)
+        field, width = 'timestamp', timedelta(0)
+    else:
+        queryset = ReadingRollup.objects.filter(
+            dataset_id=dataset_id, equipment_id=equipment_id, resolution=resolution,
+        )
+        field, width = 'bucket', ROLLUPS[resolution]
+    if start is not None:
+        # A bucket overlaps the range when it ends after start
+        queryset = queryset.filter(**{f'{field}__gt' if width else f'{field}__gte': start - width})
+    if end is not None:
+        queryset = queryset.filter(**{f'{field}__lte': end})
+    return queryset.order_by(field)
+
+
+def select_resolution(dataset_id, equipment_id, start, end, points):
+    """Finest resolution whose series over [start, end] has at most `points` points.
+
+    Each check counts at most points + 1 index entries, so picking the level
+    costs O(points) however long the range is. Falls back to the coarsest
+    rollup when nothing fits.
+    """
+    for resolution in RESOLUTIONS:
+        queryset = series_queryset(dataset_id, equipment_id, resolution, start, end)
+        if queryset[:points + 1].count() <= points:
+            return resolution, queryset
+    return resolution, queryset
+
+
+def series_points(resolution, queryset):
+    """Serialize a series queryset; rollup points carry count and min/max/mean per parameter"""
+    if resolution == RAW:
+        return list(queryset.values('timestamp', *READING_COLUMNS.values()))
+    stats = [f'{field}_{stat}' for field in READING_COLUMNS.values() for stat in ('min', 'max', 'mean')]
+    return [
+        {'timestamp': row.pop('bucket'), **row}
+        for row in queryset.values('bucket', 'count', *stats)
+    ]
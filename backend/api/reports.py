@@ -0,0 +1,181 @@
+import io
+from datetime import datetime
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.units import inch
+
+
+def build_pdf_report(dataset):
+    """Render the analysis report for a dataset into an in-memory PDF buffer"""
+    # Create PDF buffer
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    # Title
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1a365d'),
+        spaceAfter=30,
+        alignment=1  # Center
+    )
+    elements.append(Paragraph("Chemical Equipment Analysis Report", title_style))
+    elements.append(Spacer(1, 0.3 * inch))
+    
+    # Dataset info
+    info_data = [
+        ['Report Generated:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
+        ['Dataset:', dataset.filename],
+        ['Upload Date:', dataset.uploaded_at.strftime('%Y-%m-%d %H:%M:%S')],
+    ]
+    info_table = Table(info_data, colWidths=[2 * inch, 4 * inch])
+    info_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#2c5282')),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ]))
+    elements.append(info_table)
+    elements.append(Spacer(1, 0.4 * inch))
+    
+    # Summary Statistics
+    elements.append(Paragraph("Summary Statistics", styles['Heading2']))
+    elements.append(Spacer(1, 0.2 * inch))
+    
+    summary_data = [
+        ['Metric', 'Value'],
+        ['Total Equipment Count', str(dataset.total_count)],
+        ['Average Flowrate', f'{dataset.avg_flowrate:.2f}'],
+        ['Average Pressure', f'{dataset.avg_pressure:.2f}'],
+        ['Average Temperature', f'{dataset.avg_temperature:.2f}'],
+        ['Outliers', str(dataset.outlier_count)],
+    ]
+    summary_table = Table(summary_data, colWidths=[3 * inch, 2 * inch])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ]))
+    elements.append(summary_table)
+    elements.append(Spacer(1, 0.4 * inch))
+    
+    # Equipment Type Distribution
+    elements.append(Paragraph("Equipment Type Distribution", styles['Heading2']))
+    elements.append(Spacer(1, 0.2 * inch))
+    
+    type_dist = dataset.get_type_distribution()
+    type_data = [['Equipment Type', 'Count']]
+    for eq_type, count in type_dist.items():
+        type_data.append([eq_type, str(count)])
+    
+    type_table = Table(type_data, colWidths=[3 * inch, 2 * inch])
+    type_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ]))
+    elements.append(type_table)
+    elements.append(Spacer(1, 0.4 * inch))
+    
+    # Equipment Details
+    elements.append(Paragraph("Equipment Details", styles['Heading2']))
+    elements.append(Spacer(1, 0.2 * inch))
+    
+    equipment = dataset.equipment.all()[:20]  # Limit to first 20 for PDF
+    equipment_data = [['Name', 'Type', 'Flowrate', 'Pressure', 'Temp']]
+    for eq in equipment:
+        equipment_data.append([
+            eq.equipment_name[:20],  # Truncate long names
+            eq.type_name,
+            f'{eq.flowrate:.1f}',
+            f'{eq.pressure:.1f}',
+            f'{eq.temperature:.1f}'
+        ])
+    
+    equipment_table = Table(equipment_data, colWidths=[1.8*inch, 1.2*inch, 1*inch, 1*inch, 1*inch])
+    equipment_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ]))
+    elements.append(equipment_table)
+    
+    # Outliers
+    if dataset.outlier_count:
+        elements.append(Spacer(1, 0.4 * inch))
+        elements.append(Paragraph("Outliers", styles['Heading2']))
+        elements.append(Spacer(1, 0.2 * inch))
+        
+        outlier_dist = dataset.get_outlier_counts()
+        outlier_data = [['Parameter', 'Outliers']]
+        for param, count in outlier_dist.items():
+            outlier_data.append([param.capitalize(), str(count)])
+        
+        outlier_table = Table(outlier_data, colWidths=[3 * inch, 2 * inch])
+        outlier_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ]))
+        elements.append(outlier_table)
+        elements.append(Spacer(1, 0.2 * inch))
+        
+        outlier_equipment = dataset.equipment.filter(is_outlier=True)[:20]  # Limit to first 20 for PDF
+        flagged_data = [['Name', 'Type', 'Flagged Parameters']]
+        for eq in outlier_equipment:
+            flagged = [param.capitalize() for param in outlier_dist if getattr(eq, f'{param}_outlier')]
+            flagged_data.append([eq.equipment_name[:20], eq.type_name, ', '.join(flagged)])
+        
+        flagged_table = Table(flagged_data, colWidths=[1.8*inch, 1.2*inch, 3*inch])
+        flagged_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ]))
+        elements.append(flagged_table)
+    
+    # Build PDF
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
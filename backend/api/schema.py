@@ -0,0 +1,294 @@
+import codecs
+import csv
+import re
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+
+# Linear conversions to a base unit per quantity: base = value * scale + offset
+UNITS = {
+    'flowrate': {
+        'm3/s': (1.0, 0.0),
+        'm3/h': (1 / 3600, 0.0),
+        'l/s': (1e-3, 0.0),
+        'l/min': (1 / 60000, 0.0),
+        'gpm': (6.30901964e-5, 0.0),
+    },
+    'pressure': {
+        'pa': (1.0, 0.0),
+        'kpa': (1e3, 0.0),
+        'mpa': (1e6, 0.0),
+        'bar': (1e5, 0.0),
+        'psi': (6894.757293168, 0.0),
+        'atm': (101325.0, 0.0),
+    },
+    'temperature': {
+        'k': (1.0, 0.0),
+        'c': (1.0, 273.15),
+        'f': (5 / 9, 273.15 - 32 * 5 / 9),
+    },
+}
+UNIT_ALIASES = {
+    '°c': 'c', 'degc': 'c', 'celsius': 'c',
+    '°f': 'f', 'degf': 'f', 'fahrenheit': 'f',
+    'kelvin': 'k', 'm³/h': 'm3/h', 'm³/s': 'm3/s', 'lpm': 'l/min',
+}
+
+# Canonical column -> how to find and type it. 'quantity' + 'unit' enable unit
+# conversion from headers such as "Pressure (kPa)" into the canonical unit;
+# 'min'/'max' are the physically valid range in that unit. Columns with
+# 'required': False may be absent from the file.
+DEFAULT_SCHEMA = {
+    'Equipment Name': {
+        'field': 'equipment_name',
+        'aliases': ['name', 'equipment', 'equipment_name', 'tag'],
+        'dtype': 'string',
+    },
+    'Type': {
+        'field': 'equipment_type',
+        'aliases': ['equipment type', 'equipment_type', 'category'],
+        'dtype': 'category',
+    },
+    'Flowrate': {
+        'field': 'flowrate',
+        'aliases': ['flow', 'flow rate', 'flow_rate'],
+        'dtype': 'float64',
+        'quantity': 'flowrate',
+        'unit': 'm3/h',
+        'min': 0.0,
+        'max': None,
+    },
+    'Pressure': {
+        'field': 'pressure',
+        'aliases': ['press'],
+        'dtype': 'float64',
+        'quantity': 'pressure',
+        'unit': 'bar',
+        'min': 0.0,
+        'max': None,
+    },
+    'Temperature': {
+        'field': 'temperature',
+        'aliases': ['temp'],
+        'dtype': 'float64',
+        'quantity': 'temperature',
+        'unit': 'c',
+        'min': -273.15,
+        'max': None,
+    },
+    'Timestamp': {
+        'field': 'timestamp',
+        'aliases': ['time', 'datetime', 'date time', 'ts'],
+        'dtype': 'datetime',
+        'format': None,  # strftime format; inferred when None. Naive times are UTC.
+        'required': False,
+    },
+}
+
+HEADER_UNIT = re.compile(r'^(?P<name>.*?)\s*[\(\[](?P<unit>[^\)\]]+)[\)\]]\s*$')
+
+
+def _normalize(name):
+    return re.sub(r'[\s_]+', ' ', str(name)).strip().lower()
+
+
+def normalize_unit(unit):
+    unit = unit.strip().lower().replace(' ', '')
+    return UNIT_ALIASES.get(unit, unit)
+
+
+def convert_units(values, quantity, source, target):
+    """Vectorized linear unit conversion of a NumPy array"""
+    table = UNITS[quantity]
+    source, target = normalize_unit(source), normalize_unit(target)
+    if source == target:
+        return values
+    if source not in table:
+        raise ValueError(f'Unknown {quantity} unit: {source}')
+    src_scale, src_offset = table[source]
+    dst_scale, dst_offset = table[target]
+    return (values * src_scale + src_offset - dst_offset) / dst_scale
+
+
+def find_malformed(file):
+    """Scan a CSV for data records whose field count differs from the header's.
+
+    Returns (malformed, skiprows, kept): malformed lists (data row position,
+    fields) for each bad record, skiprows holds their row indexes for
+    pd.read_csv, and kept is the positions of the remaining data rows.
+    Blank lines are not data rows, but pandas counts them in skiprows (and
+    does not count line breaks inside quoted fields).
+    """
+    reader = csv.reader(codecs.iterdecode(file, 'utf-8-sig', errors='replace'))
+    width = len(next(reader, []))
+    malformed, skiprows, kept = [], [], []
+    position = 0
+    for row_index, fields in enumerate(reader, start=1):
+        if fields:
+            if len(fields) != width:
+                malformed.append((position, fields))
+                skiprows.append(row_index)
+            else:
+                kept.append(position)
+            position += 1
+    return malformed, skiprows, np.array(kept, dtype=np.int64)
+
+
+def record_lines(file, records):
+    """Line number each of the file's `records` data records starts on, by data row position.
+
+    When the file has one line per record (no blank lines or quoted line
+    breaks) this is position + 2 and the file is only scanned for newlines.
+    """
+    newlines = 0
+    last = b'\n'
+    for chunk in file.chunks():
+        if chunk:
+            newlines += chunk.count(b'\n')
+            last = chunk[-1:]
+    file.seek(0)
+    simple = np.arange(records, dtype=np.int64) + 2  # The header is line 1
+    if newlines + (last != b'\n') == records + 1:
+        return simple
+
+    try:
+        reader = csv.reader(codecs.iterdecode(file, 'utf-8-sig', errors='replace'))
+        next(reader, None)
+        lines = []
+        line_index = reader.line_num
+        for fields in reader:
+            if fields:
+                lines.append(line_index + 1)
+            line_index = reader.line_num
+    except csv.Error:
+        lines = []
+    finally:
+        file.seek(0)
+    # Should the csv module split records differently from pandas, approximate
+    return np.array(lines, dtype=np.int64) if len(lines) == records else simple
+
+
+class IngestSchema:
+    """Column mapping, dtypes and units used to read an uploaded CSV.
+
+    Per-column overrides come from settings.INGEST_SCHEMA, e.g.
+    ``{'Pressure': {'unit': 'kpa', 'dtype': 'float32'}}``.
+    """
+    def __init__(self, columns=None):
+        columns = columns if columns is not None else getattr(settings, 'INGEST_SCHEMA', {})
+        self.columns = {}
+        for name, spec in DEFAULT_SCHEMA.items():
+            self.columns[name] = {**spec, **columns.get(name, {})}
+
+    @property
+    def required_columns(self):
+        return [name for name, spec in self.columns.items() if spec.get('required', True)]
+
+    @property
+    def numeric_columns(self):
+        return [name for name, spec in self.columns.items() if spec.get('quantity')]
+
+    def resolve(self, header):
+        """Map canonical column -> (header in file, unit given in header or None).
+
+        Raises ValueError listing the required columns when any cannot be found.
+        """
+        candidates = {}
+        for column in header:
+            match = HEADER_UNIT.match(str(column))
+            base, unit = (match.group('name'), match.group('unit')) if match else (column, None)
+            candidates.setdefault(_normalize(base), (column, unit))
+
+        resolved = {}
+        for name, spec in self.columns.items():
+            for alias in [name] + list(spec.get('aliases', [])):
+                if _normalize(alias) in candidates:
+                    resolved[name] = candidates[_normalize(alias)]
+                    break
+        if any(name not in resolved for name in self.required_columns):
+            raise ValueError(f'CSV must contain columns: {", ".join(self.required_columns)}')
+        return resolved
+
+    def read_header(self, file):
+        """Resolve the file's header against the schema and rewind the file"""
+        header = pd.read_csv(file, nrows=0).columns
+        file.seek(0)
+        return self.resolve(header)
+
+    def _dtype(self, name):
+        dtype = self.columns[name]['dtype']
+        if dtype == 'string' and CSV_ENGINE == 'pyarrow':
+            return 'string[pyarrow]'  # Arrow-backed strings instead of Python objects
+        if dtype == 'datetime':
+            return self._dtype_for_text()  # Parsed after reading, see _parse_timestamps
+        return dtype
+
+    def _dtype_for_text(self):
+        return 'string[pyarrow]' if CSV_ENGINE == 'pyarrow' else 'string'
+
+    def read_csv(self, file, resolved):
+        """Read only the schema's columns with explicit dtypes, canonical names and units.
+
+        Returns (df, unparsed, malformed). Numeric and timestamp cells that
+        cannot be parsed become NaN/NaT in df and their raw strings are kept
+        in unparsed[column] (a Series that is NA where the cell parsed fine),
+        only for columns with such cells. Records with the wrong number of
+        fields are left out of df and listed in malformed as (data row
+        position, fields); df is then indexed by data row position. Optional
+        columns missing from the file are missing from df.
+        """
+        usecols = [source for source, _ in resolved.values()]
+        dtypes = {source: self._dtype(name) for name, (source, _) in resolved.items()}
+        unparsed = {}
+        malformed = []
+        try:
+            df = pd.read_csv(file, usecols=usecols, dtype=dtypes, engine=CSV_ENGINE)
+        except ValueError:
+            # Slow path for files with malformed records or bad numeric cells:
+            # skip records with the wrong field count, read numbers as text and coerce
+            file.seek(0)
+            malformed, skiprows, kept = find_malformed(file)
+            file.seek(0)
+            for name in self.numeric_columns:
+                dtypes[resolved[name][0]] = self._dtype_for_text()
+            if skiprows:
+                # The pyarrow engine only skips leading rows
+                df = pd.read_csv(file, usecols=usecols, dtype=dtypes, engine='c', skiprows=skiprows)
+                df.index = kept
+            else:
+                df = pd.read_csv(file, usecols=usecols, dtype=dtypes, engine=CSV_ENGINE)
+            for name in self.numeric_columns:
+                source = resolved[name][0]
+                raw = df[source]
+                df[source] = pd.to_numeric(raw, errors='coerce').astype(self.columns[name]['dtype'])
+                failed = raw.notna() & df[source].isna()
+                if failed.any():
+                    unparsed[name] = raw.where(failed)
+        df = df.rename(columns={source: name for name, (source, _) in resolved.items()})
+        df = df[[name for name in self.columns if name in resolved]]
+        self._parse_timestamps(df, unparsed)
+
+        for name, (_, unit) in resolved.items():
+            spec = self.columns[name]
+            if unit and spec.get('quantity') and spec.get('unit'):
+                converted = convert_units(df[name].to_numpy(), spec['quantity'], unit, spec['unit'])
+                df[name] = converted.astype(spec['dtype'], copy=False)
+        return df, unparsed, malformed
+
+    def _parse_timestamps(self, df, unparsed):
+        """Convert datetime columns to UTC timestamps in place"""
+        for name, spec in self.columns.items():
+            if spec['dtype'] != 'datetime' or name not in df:
+                continue
+            raw = df[name]
+            df[name] = pd.to_datetime(raw, format=spec.get('format'), utc=True, errors='coerce')
+            failed = raw.notna() & df[name].isna()
+            if failed.any():
+                unparsed[name] = raw.where(failed)
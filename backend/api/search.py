@@ -0,0 +1,132 @@
+import re
+from django.db import connection, connections, OperationalError
+from django.db.models import Case, When, IntegerField
+from django.db.models.functions import Length
+from .models import Equipment
+
+
+FTS_TABLE = 'api_equipment_fts'
+
+CREATE_FTS_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    equipment_name, content='api_equipment', content_rowid='id'
+)
+"""
+
+# External content table kept in sync with api_equipment by triggers
+FTS_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON api_equipment BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, equipment_name) VALUES (new.id, new.equipment_name);
+        END
+    """,
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON api_equipment BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, equipment_name)
+            VALUES ('delete', old.id, old.equipment_name);
+        END
+    """,
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF equipment_name ON api_equipment BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, equipment_name)
+            VALUES ('delete', old.id, old.equipment_name);
+            INSERT INTO {FTS_TABLE}(rowid, equipment_name) VALUES (new.id, new.equipment_name);
+        END
+    """,
+}
+
+
+def install_fts(conn):
+    """Create the FTS5 index and its sync triggers on SQLite, rebuilding if any were missing.
+
+    SQLite table rebuilds during migrations drop triggers, so this is also run
+    after every migrate. Returns False when FTS5 is unavailable.
+    """
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'api_equipment'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if set(FTS_TRIGGERS) <= existing:
+            return True
+        try:
+            cursor.execute(CREATE_FTS_TABLE)
+        except OperationalError:
+            return False  # SQLite built without FTS5
+        for name, sql in FTS_TRIGGERS.items():
+            if name not in existing:
+                cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def uninstall_fts(conn):
+    """Drop the FTS5 index and its triggers"""
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        for name in FTS_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def fts_available(conn=connection):
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def restore_fts_triggers(sender, using, **kwargs):
+    """post_migrate hook: re-create triggers dropped by SQLite table rebuilds"""
+    conn = connections[using]
+    if fts_available(conn):
+        install_fts(conn)
+
+
+def fts_query(text):
+    """Turn free text such as 'HX-3' into a phrase prefix query: "HX 3"*"""
+    tokens = re.findall(r'\w+', text)
+    if not tokens:
+        return None
+    return '"' + ' '.join(tokens) + '"*'
+
+
+def search_equipment(text, dataset_id=None, limit=50):
+    """Ranked prefix search over equipment names, FTS5 on SQLite and icontains elsewhere"""
+    if fts_available():
+        match = fts_query(text)
+        if match is None:
+            return []
+        sql = (
+            f'SELECT e.id FROM {FTS_TABLE} f JOIN api_equipment e ON e.id = f.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s'
+        )
+        params = [match]
+        if dataset_id is not None:
+            sql += ' AND e.dataset_id = %s'
+            params.append(dataset_id)
+        sql += ' ORDER BY f.rank LIMIT %s'
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            ids = [row[0] for row in cursor.fetchall()]
+        equipment = Equipment.objects.in_bulk(ids)
+        return [equipment[i] for i in ids if i in equipment]
+
+    # Fallback: substring match, names starting with the query rank first
+    queryset = Equipment.objects.filter(equipment_name__icontains=text)
+    if dataset_id is not None:
+        queryset = queryset.filter(dataset_id=dataset_id)
+    queryset = queryset.annotate(
+        prefix_rank=Case(
+            When(equipment_name__istartswith=text, then=0),
+            default=1,
+            output_field=IntegerField(),
+        ),
+        name_length=Length('equipment_name'),
+    ).order_by('prefix_rank', 'name_length', 'id')
+    return list(queryset[:limit])
@@ -1,40 +1,72 @@
 from rest_framework import serializers
-from .models import Dataset, Equipment
+from .models import Dataset, Equipment, QuarantinedRow
 
 
 class EquipmentSerializer(serializers.ModelSerializer):
+    equipment_type = serializers.CharField(source='type_name', read_only=True)
+    
     class Meta:
         model = Equipment
-        fields = ['id', 'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
+        fields = [
+            'id', 'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature',
+            'flowrate_outlier', 'pressure_outlier', 'temperature_outlier', 'is_outlier'
+        ]
 
 
 class DatasetSerializer(serializers.ModelSerializer):
     equipment = EquipmentSerializer(many=True, read_only=True)
     type_distribution = serializers.SerializerMethodField()
+    outlier_counts = serializers.SerializerMethodField()
     
     class Meta:
         model = Dataset
         fields = [
             'id', 'filename', 'uploaded_at', 'total_count',
             'avg_flowrate', 'avg_pressure', 'avg_temperature',
-            'type_distribution', 'equipment'
+            'type_distribution', 'outlier_count', 'outlier_counts', 'rejected_count', 'equipment'
+        ]
+        # Appends update these from the stored running sums, so they are not editable
+        read_only_fields = [
+            'total_count', 'avg_flowrate', 'avg_pressure', 'avg_temperature', 'outlier_count', 'rejected_count',
         ]
     
     def get_type_distribution(self, obj):
         return obj.get_type_distribution()
+    
+    def get_outlier_counts(self, obj):
+        return obj.get_outlier_counts()
 
 
 class DatasetSummarySerializer(serializers.ModelSerializer):
     """Simplified serializer for history list"""
     type_distribution = serializers.SerializerMethodField()
+    outlier_counts = serializers.SerializerMethodField()
     
     class Meta:
         model = Dataset
         fields = [
             'id', 'filename', 'uploaded_at', 'total_count',
             'avg_flowrate', 'avg_pressure', 'avg_temperature',
-            'type_distribution'
+            'type_distribution', 'outlier_count', 'outlier_counts', 'rejected_count'
         ]
     
     def get_type_distribution(self, obj):
         return obj.get_type_distribution()
+    
+    def get_outlier_counts(self, obj):
+        return obj.get_outlier_counts()
+
+
+class QuarantinedRowSerializer(serializers.ModelSerializer):
+    reasons = serializers.SerializerMethodField()
+    data = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = QuarantinedRow
+        fields = ['id', 'line_number', 'reasons', 'data']
+    
+    def get_reasons(self, obj):
+        return obj.reasons.split(',')
+    
+    def get_data(self, obj):
+        return obj.get_data()
@@ -0,0 +1,422 @@
+from datetime import timedelta
+from unittest import mock
+import pandas as pd
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError
+from django.db.models.deletion import Collector
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from . import async_views
+from .filters import query_plans
+from .models import (
+    AuthToken, Dataset, Equipment, EquipmentType, IngestLog, QuarantinedRow, Reading, ReadingRollup,
+)
+from .readings import compute_rollups, parse_time, select_resolution
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        EquipmentType.objects.clear_cache()  # Ids cached by earlier tests were rolled back
+        cls.dataset = Dataset.objects.create(filename='plans.csv', total_count=200)
+        type_ids = EquipmentType.objects.ids_for(['Pump', 'Valve'])
+        Equipment.objects.bulk_create(
+            Equipment(
+                dataset=cls.dataset,
+                equipment_name=f'E-{i}',
+                equipment_type_id=type_ids['Pump' if i % 2 else 'Valve'],
+                flowrate=i,
+                pressure=i % 60,
+                temperature=i % 150,
+            )
+            for i in range(200)
+        )
+
+    def test_range_filters_use_their_indexes(self):
+        for query, index, plan in query_plans(self.dataset.id):
+            with self.subTest(query=query):
+                self.assertIn(index, plan)
+
+
+class SearchLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        EquipmentType.objects.clear_cache()
+        dataset = Dataset.objects.create(filename='search.csv', total_count=3)
+        type_id = EquipmentType.objects.ids_for(['Pump'])['Pump']
+        Equipment.objects.bulk_create(
+            Equipment(dataset=dataset, equipment_name=f'P-10{i}', equipment_type_id=type_id,
+                      flowrate=1, pressure=1, temperature=1)
+            for i in range(3)
+        )
+
+    def test_limit_must_be_positive(self):
+        for limit in ('-1', '0'):
+            with self.subTest(limit=limit):
+                response = self.client.get('/api/equipment/search/', {'q': 'P-10', 'limit': limit})
+                self.assertEqual(response.status_code, 400)
+
+    def test_limit_caps_results(self):
+        response = self.client.get('/api/equipment/search/', {'q': 'P-10', 'limit': '2'})
+        self.assertEqual(len(response.json()), 2)
+
+
+class ResponseSizeMetricTests(TestCase):
+    def response_size_sum(self, route):
+        return REGISTRY.get_sample_value(
+            'api_response_size_bytes_sum', {'method': 'GET', 'route': route},
+        ) or 0
+
+    def test_streamed_export_size_is_recorded(self):
+        dataset = Dataset.objects.create(filename='metrics.csv', total_count=1)
+        before = self.response_size_sum('dataset-export')
+        response = self.client.get(f'/api/datasets/{dataset.id}/export/')
+        body = b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(self.response_size_sum('dataset-export') - before, len(body))
+
+
+class MalformedRowTests(TestCase):
+    CSV = (
+        b'Equipment Name,Type,Flowrate,Pressure,Temperature\n'
+        b'P-1,Pump,10,2,50\n'
+        b'P-2,Pump,20,4,60,extra\n'
+        b'P-3,Pump,30,6,70\n'
+        b'V-1,Valve,5\n'
+        b'V-2,Valve,x,1,20\n'
+        b'V-3,Valve,7,1,20\n'
+    )
+
+    def setUp(self):
+        EquipmentType.objects.clear_cache()
+
+    def upload(self):
+        file = SimpleUploadedFile('malformed.csv', self.CSV, content_type='text/csv')
+        return self.client.post('/api/datasets/upload/', {'file': file})
+
+    def test_malformed_rows_are_quarantined(self):
+        for engine in ('pyarrow', 'c'):
+            with self.subTest(engine=engine), mock.patch('api.schema.CSV_ENGINE', engine):
+                response = self.upload()
+                self.assertEqual(response.status_code, 201)
+                validation = response.json()['validation']
+                self.assertEqual(validation['total_rows'], 6)
+                self.assertEqual(validation['accepted'], 3)
+                self.assertEqual(validation['reasons'], {'malformed_row': 2, 'not_numeric:flowrate': 1})
+                self.assertEqual(
+                    [row['equipment_name'] for row in response.json()['equipment']], ['P-1', 'P-3', 'V-3'],
+                )
+
+                rows = QuarantinedRow.objects.filter(dataset_id=response.json()['id'])
+                self.assertEqual(
+                    [(row.line_number, row.reasons) for row in rows],
+                    [(3, 'malformed_row'), (5, 'malformed_row'), (6, 'not_numeric:flowrate')],
+                )
+                self.assertEqual(rows[0].get_data(), {'fields': ['P-2', 'Pump', '20', '4', '60', 'extra']})
+
+    def test_line_numbers_count_blank_lines_and_quoted_line_breaks(self):
+        self.CSV = (
+            b'Equipment Name,Type,Flowrate,Pressure,Temperature\n'
+            b'P-1,Pump,10,2,50\n'
+            b'\n'
+            b'"P-2\nspare",Pump,x,4,60\n'
+            b'V-1,Valve,-5,1,20\n'
+            b'V-2,Valve,5,1,20,extra\n'
+            b'V-3,Valve,7,1,20\n'
+        )
+        for engine in ('pyarrow', 'c'):
+            with self.subTest(engine=engine), mock.patch('api.schema.CSV_ENGINE', engine):
+                response = self.upload()
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(
+                    [row['equipment_name'] for row in response.json()['equipment']], ['P-1', 'V-3'],
+                )
+                rows = QuarantinedRow.objects.filter(dataset_id=response.json()['id'])
+                self.assertEqual(
+                    [(row.line_number, row.reasons) for row in rows],
+                    [(4, 'not_numeric:flowrate'), (6, 'out_of_range:flowrate'), (7, 'malformed_row')],
+                )
+
+
+class AppendTests(TestCase):
+    CSV = (
+        b'Equipment Name,Type,Flowrate,Pressure,Temperature\n'
+        b'P-1,Pump,10,1,50\n'
+        b'P-2,Pump,20,1,50\n'
+        b'P-3,Pump,30,1,50\n'
+        b'V-1,Valve,5,1,20\n'
+    )
+    APPENDED = (
+        b'Equipment Name,Type,Flowrate,Pressure,Temperature\n'
+        b'P-4,Pump,10,1,50\n'
+        b'P-5,Pump,10,1,50\n'
+        b'P-6,Pump,10,1,50\n'
+        b'P-7,Pump,10,1,50\n'
+        b'P-8,Pump,1000,1,50\n'
+        b'P-9,Pump,x,1,50\n'
+        b'C-1,Compressor,7,2,30\n'
+    )
+
+    def setUp(self):
+        EquipmentType.objects.clear_cache()
+        file = SimpleUploadedFile('first.csv', self.CSV, content_type='text/csv')
+        self.dataset_id = self.client.post('/api/datasets/upload/', {'file': file}).json()['id']
+
+    def append(self):
+        file = SimpleUploadedFile('more.csv', self.APPENDED, content_type='text/csv')
+        return self.client.post(f'/api/datasets/{self.dataset_id}/append/', {'file': file})
+
+    def test_append_updates_running_totals(self):
+        response = self.append()
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['total_count'], 10)
+        self.assertAlmostEqual(data['avg_flowrate'], 1112 / 10)
+        self.assertAlmostEqual(data['avg_pressure'], 11 / 10)
+        self.assertAlmostEqual(data['avg_temperature'], 450 / 10)
+        self.assertEqual(data['type_distribution'], {'Pump': 8, 'Valve': 1, 'Compressor': 1})
+        self.assertEqual(data['outlier_count'], 1)
+        self.assertEqual(data['outlier_counts'], {'flowrate': 1, 'pressure': 0, 'temperature': 0})
+        self.assertEqual(data['rejected_count'], 1)
+
+        dataset = Dataset.objects.get(pk=self.dataset_id)
+        self.assertEqual(
+            (dataset.sum_flowrate, dataset.sum_pressure, dataset.sum_temperature), (1112.0, 11.0, 450.0),
+        )
+        self.assertEqual(dataset.equipment.count(), 10)
+
+    def test_summary_fields_are_read_only(self):
+        response = self.client.patch(
+            f'/api/datasets/{self.dataset_id}/',
+            {'filename': 'renamed.csv', 'total_count': 1, 'avg_flowrate': 0},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['filename'], 'renamed.csv')
+        self.assertEqual(response.json()['total_count'], 4)
+        self.assertEqual(self.append().json()['total_count'], 10)
+
+
+class RollupTests(TestCase):
+    def test_compute_rollups_aggregates_each_level(self):
+        df = pd.DataFrame({
+            'Equipment Name': ['E-1', 'E-1', 'E-1', 'E-2'],
+            'Timestamp': pd.to_datetime([
+                '2024-01-01T00:00:10', '2024-01-01T00:00:40', '2024-01-01T00:01:05', '2024-01-01T00:00:20',
+            ], utc=True),
+            'Flowrate': [1.0, 3.0, 5.0, 7.0],
+            'Pressure': [2.0, 2.0, 2.0, 1.0],
+            'Temperature': [10.0, 20.0, 30.0, 40.0],
+        })
+        rollups = compute_rollups(df, {'E-1': 1, 'E-2': 2})
+        self.assertEqual(list(rollups), ['1m', '1h', '1d'])
+
+        minutes = rollups['1m'].set_index(['equipment_id', 'bucket'])
+        first = minutes.loc[(1, pd.Timestamp('2024-01-01T00:00', tz='UTC'))]
+        self.assertEqual(
+            (first['count'], first['flowrate_min'], first['flowrate_max'], first['flowrate_sum']), (2, 1.0, 3.0, 4.0),
+        )
+        self.assertEqual(minutes.loc[(1, pd.Timestamp('2024-01-01T00:01', tz='UTC'))]['count'], 1)
+
+        for resolution in ('1h', '1d'):
+            level = rollups[resolution].set_index('equipment_id')
+            self.assertEqual(len(level), 2)
+            self.assertEqual(level.loc[1, 'count'], 3)
+            self.assertEqual((level.loc[1, 'temperature_min'], level.loc[1, 'temperature_max']), (10.0, 30.0))
+            self.assertEqual(level.loc[1, 'flowrate_sum'], 9.0)
+            self.assertEqual(level.loc[2, 'flowrate_sum'], 7.0)
+
+
+class SelectResolutionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        EquipmentType.objects.clear_cache()
+        # E-1 reads once a minute for two hours
+        lines = [b'Equipment Name,Type,Flowrate,Pressure,Temperature,Timestamp']
+        lines += [b'E-1,Pump,%d,2,50,2024-01-01T%02d:%02d:00' % (i, i // 60, i % 60) for i in range(120)]
+        file = SimpleUploadedFile('series.csv', b'\n'.join(lines) + b'\n', content_type='text/csv')
+        cls.client_class().post('/api/datasets/upload/', {'file': file})
+        cls.equipment = Equipment.objects.get(equipment_name='E-1')
+
+    def select(self, points, start=None, end=None):
+        resolution, queryset = select_resolution(self.equipment.dataset_id, self.equipment.id, start, end, points)
+        return resolution, queryset.count()
+
+    def test_finest_level_that_fits(self):
+        self.assertEqual(self.select(120), ('raw', 120))
+        self.assertEqual(self.select(119), ('1h', 2))
+        self.assertEqual(self.select(1), ('1d', 1))
+
+    def test_range_limits_the_count(self):
+        start = parse_time('2024-01-01T00:30:00', 'start')
+        end = parse_time('2024-01-01T00:59:00', 'end')
+        self.assertEqual(self.select(30, start, end), ('raw', 30))
+        self.assertEqual(self.select(29, start, end), ('1h', 1))
+
+    def test_falls_back_to_coarsest_level(self):
+        self.assertEqual(self.select(0), ('1d', 1))
+
+    def test_dataset_delete_removes_readings(self):
+        dataset = self.equipment.dataset
+        # Readings go with the dataset, so its equipment rows need no per-row cascade
+        self.assertTrue(Collector(using='default').can_fast_delete(dataset.equipment.all()))
+        dataset.delete()
+        self.assertFalse(Reading.objects.exists())
+        self.assertFalse(ReadingRollup.objects.exists())
+
+
+class EquipmentTypeAdminTests(TestCase):
+    def test_types_cannot_be_renamed_or_deleted(self):
+        EquipmentType.objects.clear_cache()
+        type_id = EquipmentType.objects.ids_for(['Pump'])['Pump']
+        self.client.force_login(User.objects.create_superuser('admin', password='secret'))
+        response = self.client.post(f'/admin/api/equipmenttype/{type_id}/change/', {'name': 'Compressor'})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post(f'/admin/api/equipmenttype/{type_id}/delete/', {'post': 'yes'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(EquipmentType.objects.get(pk=type_id).name, 'Pump')
+
+
+class TokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='secret')
+
+    def login(self):
+        response = self.client.post('/api/login/', {'username': 'alice', 'password': 'secret'})
+        return response.json()['token']
+
+    def test_login_purges_expired_tokens(self):
+        self.login()
+        AuthToken.objects.update(created_at=timezone.now() - settings.AUTH_TOKEN_MAX_AGE - timedelta(minutes=1))
+        self.login()
+        self.assertEqual(AuthToken.objects.filter(user=self.user).count(), 1)
+
+    def test_login_ignores_stale_token(self):
+        response = self.client.post(
+            '/api/login/', {'username': 'alice', 'password': 'secret'}, HTTP_AUTHORIZATION='Token stale',
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(
+            '/api/register/', {'username': 'bob', 'password': 'secret'}, HTTP_AUTHORIZATION='Token stale',
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_logout_revokes_token(self):
+        token = self.login()
+        response = self.client.post('/api/logout/', HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AuthToken.objects.exists())
+        response = self.client.post('/api/logout/', HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(response.status_code, 401)
+
+
+class AsyncStreamTypeNameTests(TransactionTestCase):
+    def setUp(self):
+        EquipmentType.objects.clear_cache()
+        self.dataset = Dataset.objects.create(filename='stream.csv', total_count=1)
+        type_id = EquipmentType.objects.ids_for(['Pump'])['Pump']
+        Equipment.objects.create(
+            dataset=self.dataset, equipment_name='P-1', equipment_type_id=type_id,
+            flowrate=1, pressure=2, temperature=3,
+        )
+
+    async def test_types_created_after_the_snapshot_are_named(self):
+        equipment = Equipment.objects.filter(dataset=self.dataset)
+        rows = [row async for row in async_views._equipment_rows(equipment, {})]
+        self.assertEqual(rows[0]['equipment_type'], 'Pump')
+        chunks = [chunk async for chunk in async_views._csv_export(equipment, {})]
+        self.assertIn('P-1,Pump,', ''.join(chunks))
+
+
+class AsyncUploadAuthenticationTests(TransactionTestCase):
+    CSV = b'Equipment Name,Type,Flowrate,Pressure,Temperature\nP-1,Pump,10,2,50\n'
+    CSRF_TOKEN = 'a' * 32
+
+    def setUp(self):
+        EquipmentType.objects.clear_cache()
+        self.user = User.objects.create_user('alice', password='secret')
+
+    def session_request(self, csrf):
+        file = SimpleUploadedFile('session.csv', self.CSV, content_type='text/csv')
+        headers = {'X-CSRFToken': self.CSRF_TOKEN} if csrf else {}
+        request = AsyncRequestFactory().post('/api/datasets/upload/', {'file': file}, headers=headers)
+        request.COOKIES[settings.CSRF_COOKIE_NAME] = self.CSRF_TOKEN
+        request.user = self.user  # As set by AuthenticationMiddleware for a logged in session
+        return request
+
+    async def test_session_upload_keeps_user(self):
+        response = await async_views.dataset_upload(self.session_request(csrf=True))
+        self.assertEqual(response.status_code, 201)
+        dataset = await Dataset.objects.select_related('user').aget()
+        self.assertEqual(dataset.user, self.user)
+
+    async def test_session_upload_requires_csrf_token(self):
+        response = await async_views.dataset_upload(self.session_request(csrf=False))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(await Dataset.objects.aexists())
+
+
+class WriteRetryTests(TransactionTestCase):
+    CSV = b'Equipment Name,Type,Flowrate,Pressure,Temperature\nP-1,Pump,10,2,50\n'
+
+    def setUp(self):
+        EquipmentType.objects.clear_cache()
+
+    def upload(self):
+        file = SimpleUploadedFile('retry.csv', self.CSV, content_type='text/csv')
+        return self.client.post('/api/datasets/upload/', {'file': file})
+
+    @override_settings(WRITE_RETRY_BACKOFF=0)
+    def test_retried_upload_times_stages_once(self):
+        with mock.patch('api.ingest.prune_datasets', side_effect=[OperationalError('database is locked'), None]):
+            response = self.upload()
+        self.assertEqual(response.status_code, 201)
+        names = [stage['name'] for stage in response.json()['ingest']['stages']]
+        self.assertEqual(names.count('insert'), 1)
+        self.assertEqual(names.count('quarantine'), 1)
+
+    @override_settings(WRITE_RETRY_BACKOFF=0)
+    def test_new_type_insert_is_retried(self):
+        bulk_create = EquipmentType.objects.bulk_create
+        calls = []
+
+        def locked_once(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(EquipmentType.objects, 'bulk_create', side_effect=locked_once):
+            response = self.upload()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(EquipmentType.objects.filter(name='Pump').exists())
+
+    @override_settings(WRITE_RETRIES=0, WRITE_RETRY_AFTER=7)
+    def test_locked_database_returns_503(self):
+        with mock.patch('api.ingest.prune_datasets', side_effect=OperationalError('database is locked')):
+            response = self.upload()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+        self.assertFalse(Dataset.objects.exists())
+
+    @override_settings(WRITE_RETRIES=0)
+    def test_locked_log_write_stores_nothing(self):
+        with mock.patch('api.ingest.IngestLog.save', side_effect=OperationalError('database is locked')):
+            response = self.upload()
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_log_is_stored_with_the_dataset(self):
+        response = self.upload()
+        log = IngestLog.objects.get(dataset_id=response.json()['id'])
+        self.assertEqual([stage['name'] for stage in log.get_stages()][-1], 'prune')
+
+    def test_other_database_errors_are_not_retryable(self):
+        with mock.patch('api.ingest.prune_datasets', side_effect=OperationalError('no such table: api_dataset')):
+            response = self.upload()
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('Retry-After', response)
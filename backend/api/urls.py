@@ -1,12 +1,29 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DatasetViewSet, register_user, login_user
+from .views import DatasetViewSet, EquipmentViewSet, register_user, login_user, logout_user, metrics_view
 
 router = DefaultRouter()
 router.register(r'datasets', DatasetViewSet)
+router.register(r'equipment', EquipmentViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
     path('register/', register_user, name='register'),
     path('login/', login_user, name='login'),
+    path('logout/', logout_user, name='logout'),
+    path('metrics/', metrics_view, name='metrics'),
 ]
+
+if settings.ASYNC_VIEWS:
+    from . import async_views
+
+    # Take precedence over the router's routes of the same name
+    urlpatterns = [
+        path('datasets/upload/', async_views.dataset_upload, name='dataset-upload'),
+        path('datasets/history/', async_views.dataset_history, name='dataset-history'),
+        path('datasets/<int:pk>/', async_views.dataset_detail, name='dataset-detail'),
+        path('datasets/<int:pk>/generate_pdf/', async_views.dataset_pdf, name='dataset-generate-pdf'),
+        path('datasets/<int:pk>/export/', async_views.dataset_export, name='dataset-export'),
+        path('equipment/', async_views.equipment_list, name='equipment-list'),
+    ] + urlpatterns
@@ -0,0 +1,123 @@
+import heapq
+import numpy as np
+import pandas as pd
+
+
+# Reason codes stored on quarantined rows; per-column codes are suffixed with
+# the field name, e.g. 'not_numeric:pressure'
+MISSING_VALUE = 'missing_value'
+NOT_NUMERIC = 'not_numeric'
+INVALID_TIMESTAMP = 'invalid_timestamp'
+OUT_OF_RANGE = 'out_of_range'
+DUPLICATE_NAME = 'duplicate_name'
+MALFORMED_ROW = 'malformed_row'  # Wrong number of fields; the row never reaches the DataFrame
+
+
+class ValidationResult:
+    """Boolean accept mask for a DataFrame plus reasons for every rejected row"""
+    def __init__(self, valid, checks, malformed=()):
+        self.valid = valid
+        self.checks = checks  # list of (reason code, rejection mask)
+        self.malformed = malformed  # (data row position, fields) of rows that could not be parsed
+
+    @property
+    def accepted(self):
+        return int(self.valid.sum())
+
+    @property
+    def rejected(self):
+        return len(self.valid) - self.accepted + len(self.malformed)
+
+    def reason_counts(self):
+        counts = {MALFORMED_ROW: len(self.malformed)} if self.malformed else {}
+        for code, mask in self.checks:
+            count = int(mask.sum())
+            if count:
+                counts[code] = counts.get(code, 0) + count
+        return counts
+
+    def rejected_reasons(self):
+        """Return (row positions, list of reason code lists) for rejected rows"""
+        positions = np.flatnonzero(~self.valid)
+        reasons = [[] for _ in positions]
+        for code, mask in self.checks:
+            for i in np.flatnonzero(mask[positions]):
+                reasons[i].append(code)
+        return positions, reasons
+
+    def summary(self):
+        return {
+            'total_rows': len(self.valid) + len(self.malformed),
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'reasons': self.reason_counts(),
+        }
+
+
+def validate_rows(df, schema, unparsed, malformed=()):
+    """Check every row with vectorized masks: missing values, numeric and
+    timestamp parsing, per-parameter physical ranges and duplicate equipment
+    names (or duplicate name and timestamp pairs for timestamped readings).
+    Malformed rows from IngestSchema.read_csv are counted as rejected.
+    """
+    checks = []
+    for name, spec in schema.columns.items():
+        if name not in df:
+            continue  # Optional column absent from the file
+        field = spec['field']
+        missing = df[name].isna().to_numpy()
+        if name in unparsed:
+            not_parsed = unparsed[name].notna().to_numpy()
+            code = INVALID_TIMESTAMP if spec['dtype'] == 'datetime' else NOT_NUMERIC
+            checks.append((f'{code}:{field}', not_parsed))
+            missing &= ~not_parsed
+        checks.append((f'{MISSING_VALUE}:{field}', missing))
+
+        if spec.get('quantity'):
+            values = df[name].to_numpy(dtype=np.float64)
+            out_of_range = np.zeros(len(df), dtype=bool)
+            with np.errstate(invalid='ignore'):
+                if spec.get('min') is not None:
+                    out_of_range |= values < spec['min']
+                if spec.get('max') is not None:
+                    out_of_range |= values > spec['max']
+            checks.append((f'{OUT_OF_RANGE}:{field}', out_of_range))
+
+    names = df['Equipment Name']
+    if 'Timestamp' in df:
+        duplicates = df.duplicated(['Equipment Name', 'Timestamp'], keep='first') & names.notna()
+    else:
+        duplicates = names.duplicated(keep='first') & names.notna()
+    checks.append((DUPLICATE_NAME, duplicates.to_numpy()))
+
+    checks = [(code, mask) for code, mask in checks if mask.any()]
+    rejected = np.zeros(len(df), dtype=bool)
+    for _, mask in checks:
+        rejected |= mask
+    return ValidationResult(~rejected, checks, malformed)
+
+
+def _rejected_parsed_rows(df, result, unparsed, lines):
+    positions, reasons = result.rejected_reasons()
+    if not len(positions):
+        return
+    subset = df.iloc[positions].astype(object)
+    for name, raw in unparsed.items():
+        bad = raw.iloc[positions].astype(object)
+        subset[name] = bad.where(bad.notna(), subset[name])
+    subset = subset.where(pd.notna(subset), None)
+    for position, row_reasons, values in zip(df.index[positions], reasons, subset.to_dict('records')):
+        yield int(lines[position]), row_reasons, values
+
+
+def rejected_rows(df, result, unparsed, lines):
+    """Yield (csv line number, reasons, raw values dict) for each rejected row, in file order.
+
+    lines maps data row positions to line numbers (see schema.record_lines).
+    Malformed rows carry their raw fields as {'fields': [...]}.
+    """
+    malformed = (
+        (int(lines[position]), [MALFORMED_ROW], {'fields': fields})
+        for position, fields in result.malformed
+    )
+    yield from heapq.merge(_rejected_parsed_rows(df, result, unparsed, lines), malformed, key=lambda row: row[0])
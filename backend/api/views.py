@@ -1,226 +1,204 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.http import FileResponse
+from rest_framework.pagination import LimitOffsetPagination
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.db.models import Prefetch
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from .models import Dataset, Equipment
-from .serializers import DatasetSerializer, DatasetSummarySerializer, EquipmentSerializer
-import pandas as pd
-import io
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
-from datetime import datetime
+from .serializers import (
+    DatasetSerializer, DatasetSummarySerializer, EquipmentSerializer, QuarantinedRowSerializer,
+)
+from .analytics import DEFAULT_TREND_LIMIT, MAX_TREND_LIMIT, parse_id_list, compare_datasets, dataset_trend
+from .ingest import IngestError, get_upload_file, upload_csv
+from .reports import build_pdf_report
+from .export import EXPORT_FORMATS, check_format, csv_chunks, export_file
+from .readings import (
+    DEFAULT_POINTS, MAX_POINTS, RESOLUTIONS, parse_time, select_resolution, series_points, series_queryset,
+)
+from .filters import filter_equipment
+from .search import search_equipment
+from .authentication import issue_token, revoke_token, TokenAuthentication
+from .writes import database_locked
+from . import metrics
+
+
+def _database_busy(error):
+    """503 for a write that still found the database locked after its retries"""
+    response = Response({'error': str(error)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = str(settings.WRITE_RETRY_AFTER)
+    return response
 
 
 class DatasetViewSet(viewsets.ModelViewSet):
-    queryset = Dataset.objects.all()
+    queryset = Dataset.objects.prefetch_related('type_counts')
     serializer_class = DatasetSerializer
     permission_classes = [AllowAny]  # Change to IsAuthenticated for production
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve' and self.request.query_params.get('outliers') == 'only':
+            queryset = queryset.prefetch_related(
+                Prefetch('equipment', queryset=Equipment.objects.filter(is_outlier=True))
+            )
+        return queryset
+    
+    def perform_content_negotiation(self, request, force=False):
+        # On export ?format= names the file format, not a DRF renderer
+        return super().perform_content_negotiation(request, force=force or self.action == 'export')
+    
     @action(detail=False, methods=['post'])
     def upload(self, request):
         """Handle CSV file upload and data processing"""
-        if 'file' not in request.FILES:
-            return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        file = request.FILES['file']
-        
-        # Validate file extension
-        if not file.name.endswith('.csv'):
-            return Response({'error': 'File must be a CSV'}, status=status.HTTP_400_BAD_REQUEST)
+        user = request.user if request.user.is_authenticated else None
+        profile_dir = settings.INGEST_PROFILE_DIR if request.query_params.get('profile') == '1' else None
+        try:
+            file = get_upload_file(request.FILES)
+            data, timer = upload_csv(file, user, profile_dir)
+        except IngestError as e:
+            return Response(e.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            if database_locked(e):
+                return _database_busy(e)
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
+        response = Response(data, status=status.HTTP_201_CREATED)
+        response['Server-Timing'] = timer.server_timing()
+        return response
+    
+    @action(detail=True, methods=['post'])
+    def append(self, request, pk=None):
+        """Add the rows of another CSV to an existing dataset"""
+        dataset = self.get_object()
+        user = request.user if request.user.is_authenticated else None
+        profile_dir = settings.INGEST_PROFILE_DIR if request.query_params.get('profile') == '1' else None
         try:
-            # Read CSV file
-            df = pd.read_csv(file)
-            
-            # Validate required columns
-            required_columns = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
-            if not all(col in df.columns for col in required_columns):
-                return Response(
-                    {'error': f'CSV must contain columns: {", ".join(required_columns)}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Calculate summary statistics
-            total_count = len(df)
-            avg_flowrate = df['Flowrate'].mean()
-            avg_pressure = df['Pressure'].mean()
-            avg_temperature = df['Temperature'].mean()
-            type_distribution = df['Type'].value_counts().to_dict()
-            
-            # Create dataset record
-            dataset = Dataset.objects.create(
-                user=request.user if request.user.is_authenticated else None,
-                filename=file.name,
-                total_count=total_count,
-                avg_flowrate=avg_flowrate,
-                avg_pressure=avg_pressure,
-                avg_temperature=avg_temperature,
-            )
-            dataset.set_type_distribution(type_distribution)
-            dataset.save()
-            
-            # Create equipment records
-            for _, row in df.iterrows():
-                Equipment.objects.create(
-                    dataset=dataset,
-                    equipment_name=row['Equipment Name'],
-                    equipment_type=row['Type'],
-                    flowrate=row['Flowrate'],
-                    pressure=row['Pressure'],
-                    temperature=row['Temperature']
-                )
-            
-            # Keep only last 5 datasets
-            datasets = Dataset.objects.all()
-            if datasets.count() > 5:
-                datasets_to_delete = datasets[5:]
-                for ds in datasets_to_delete:
-                    ds.delete()
-            
-            serializer = self.get_serializer(dataset)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-            
+            file = get_upload_file(request.FILES)
+            data, timer = upload_csv(file, user, profile_dir, dataset=dataset)
+        except IngestError as e:
+            return Response(e.as_dict(), status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
+            if database_locked(e):
+                return _database_busy(e)
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = Response(data, status=status.HTTP_200_OK)
+        response['Server-Timing'] = timer.server_timing()
+        return response
+    
+    @action(detail=True, methods=['get'])
+    def quarantine(self, request, pk=None):
+        """Rows of a dataset rejected by validation, with reason codes"""
+        dataset = self.get_object()
+        rows = dataset.quarantined_rows.all()
+        paginator = LimitOffsetPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(QuarantinedRowSerializer(page, many=True).data)
+        return Response(QuarantinedRowSerializer(rows, many=True).data)
+    
+    @action(detail=True, methods=['get'])
+    def readings(self, request, pk=None):
+        """Time series of one equipment's readings, e.g. ?equipment=P-101&start=2024-01-01&points=500.
+
+        Served from the finest of raw/1m/1h/1d that fits the point budget,
+        unless ?resolution= picks one.
+        """
+        dataset = self.get_object()
+        name = request.query_params.get('equipment')
+        if not name:
+            return Response({'error': 'equipment is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start = parse_time(request.query_params.get('start'), 'start')
+            end = parse_time(request.query_params.get('end'), 'end')
+        except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            points = min(int(request.query_params.get('points', DEFAULT_POINTS)), MAX_POINTS)
+        except ValueError:
+            points = 0
+        if points < 1:
+            return Response({'error': 'points must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        equipment_id = dataset.equipment.filter(equipment_name=name).values_list('id', flat=True).first()
+        if equipment_id is None:
+            return Response({'error': f'Equipment not found: {name}'}, status=status.HTTP_404_NOT_FOUND)
+        
+        resolution = request.query_params.get('resolution')
+        if resolution:
+            if resolution not in RESOLUTIONS:
+                return Response({'error': f'resolution must be one of: {", ".join(RESOLUTIONS)}'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            queryset = series_queryset(dataset.id, equipment_id, resolution, start, end)
+        else:
+            resolution, queryset = select_resolution(dataset.id, equipment_id, start, end, points)
+        return Response({
+            'equipment': name,
+            'resolution': resolution,
+            'points': series_points(resolution, queryset[:points]),
+        })
     
     @action(detail=False, methods=['get'])
     def history(self, request):
         """Get last 5 uploaded datasets"""
-        datasets = Dataset.objects.all()[:5]
+        datasets = self.get_queryset()[:5]
         serializer = DatasetSummarySerializer(datasets, many=True)
         return Response(serializer.data)
     
+    def _datasets_from_ids(self, request):
+        """Resolve ?ids= into datasets, returning (datasets, error_response)"""
+        try:
+            ids = parse_id_list(request.query_params.get('ids'))
+        except ValueError:
+            return None, Response({'error': 'ids must be a comma separated list of integers'},
+                                  status=status.HTTP_400_BAD_REQUEST)
+        
+        datasets = self.get_queryset().in_bulk(ids)
+        missing = [str(i) for i in ids if i not in datasets]
+        if missing:
+            return None, Response({'error': f'Datasets not found: {", ".join(missing)}'},
+                                  status=status.HTTP_404_NOT_FOUND)
+        return [datasets[i] for i in ids], None
+    
+    @action(detail=False, methods=['get'])
+    def compare(self, request):
+        """Compare several datasets side by side using their stored aggregates"""
+        datasets, error = self._datasets_from_ids(request)
+        if error:
+            return error
+        if len(datasets) < 2:
+            return Response({'error': 'Provide at least two dataset ids to compare'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(compare_datasets(datasets))
+    
+    @action(detail=False, methods=['get'])
+    def trend(self, request):
+        """Parameter drift across datasets over time"""
+        if request.query_params.get('ids'):
+            datasets, error = self._datasets_from_ids(request)
+            if error:
+                return error
+            datasets.sort(key=lambda ds: ds.uploaded_at)
+        else:
+            try:
+                limit = int(request.query_params.get('limit', DEFAULT_TREND_LIMIT))
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                return Response({'error': 'limit must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+            limit = min(limit, MAX_TREND_LIMIT)
+            datasets = list(self.get_queryset()[:limit])[::-1]
+        return Response(dataset_trend(datasets))
+    
     @action(detail=True, methods=['get'])
     def generate_pdf(self, request, pk=None):
         """Generate PDF report for a dataset"""
         dataset = self.get_object()
         
-        # Create PDF buffer
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1a365d'),
-            spaceAfter=30,
-            alignment=1  # Center
-        )
-        elements.append(Paragraph("Chemical Equipment Analysis Report", title_style))
-        elements.append(Spacer(1, 0.3 * inch))
-        
-        # Dataset info
-        info_data = [
-            ['Report Generated:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
-            ['Dataset:', dataset.filename],
-            ['Upload Date:', dataset.uploaded_at.strftime('%Y-%m-%d %H:%M:%S')],
-        ]
-        info_table = Table(info_data, colWidths=[2 * inch, 4 * inch])
-        info_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#2c5282')),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ]))
-        elements.append(info_table)
-        elements.append(Spacer(1, 0.4 * inch))
-        
-        # Summary Statistics
-        elements.append(Paragraph("Summary Statistics", styles['Heading2']))
-        elements.append(Spacer(1, 0.2 * inch))
-        
-        summary_data = [
-            ['Metric', 'Value'],
-            ['Total Equipment Count', str(dataset.total_count)],
-            ['Average Flowrate', f'{dataset.avg_flowrate:.2f}'],
-            ['Average Pressure', f'{dataset.avg_pressure:.2f}'],
-            ['Average Temperature', f'{dataset.avg_temperature:.2f}'],
-        ]
-        summary_table = Table(summary_data, colWidths=[3 * inch, 2 * inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ]))
-        elements.append(summary_table)
-        elements.append(Spacer(1, 0.4 * inch))
-        
-        # Equipment Type Distribution
-        elements.append(Paragraph("Equipment Type Distribution", styles['Heading2']))
-        elements.append(Spacer(1, 0.2 * inch))
-        
-        type_dist = dataset.get_type_distribution()
-        type_data = [['Equipment Type', 'Count']]
-        for eq_type, count in type_dist.items():
-            type_data.append([eq_type, str(count)])
-        
-        type_table = Table(type_data, colWidths=[3 * inch, 2 * inch])
-        type_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ]))
-        elements.append(type_table)
-        elements.append(Spacer(1, 0.4 * inch))
-        
-        # Equipment Details
-        elements.append(Paragraph("Equipment Details", styles['Heading2']))
-        elements.append(Spacer(1, 0.2 * inch))
-        
-        equipment = dataset.equipment.all()[:20]  # Limit to first 20 for PDF
-        equipment_data = [['Name', 'Type', 'Flowrate', 'Pressure', 'Temp']]
-        for eq in equipment:
-            equipment_data.append([
-                eq.equipment_name[:20],  # Truncate long names
-                eq.equipment_type,
-                f'{eq.flowrate:.1f}',
-                f'{eq.pressure:.1f}',
-                f'{eq.temperature:.1f}'
-            ])
-        
-        equipment_table = Table(equipment_data, colWidths=[1.8*inch, 1.2*inch, 1*inch, 1*inch, 1*inch])
-        equipment_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5282')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ]))
-        elements.append(equipment_table)
-        
-        # Build PDF
-        doc.build(elements)
-        buffer.seek(0)
+        buffer = build_pdf_report(dataset)
         
         return FileResponse(
             buffer,
@@ -228,9 +206,74 @@ class DatasetViewSet(viewsets.ModelViewSet):
             filename=f'equipment_report_{dataset.id}.pdf',
             content_type='application/pdf'
         )
+    
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """Download equipment rows as ?format=csv|parquet|xlsx, filtered like /api/equipment/"""
+        dataset = self.get_object()
+        export_format = request.query_params.get('format', 'csv')
+        try:
+            check_format(export_format)
+            queryset = filter_equipment(dataset.equipment.all(), request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        filename = f'equipment_{dataset.id}.{export_format}'
+        if export_format == 'csv':
+            response = StreamingHttpResponse(csv_chunks(queryset), content_type=EXPORT_FORMATS['csv'])
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+        return FileResponse(
+            export_file(queryset, export_format),
+            as_attachment=True,
+            filename=filename,
+            content_type=EXPORT_FORMATS[export_format]
+        )
+
+
+class EquipmentViewSet(viewsets.ReadOnlyModelViewSet):
+    """Query equipment across datasets with type, range and ordering filters"""
+    queryset = Equipment.objects.all()
+    serializer_class = EquipmentSerializer
+    permission_classes = [AllowAny]
+    pagination_class = LimitOffsetPagination  # Only paginates when ?limit= is given
+    
+    def list(self, request, *args, **kwargs):
+        try:
+            queryset = filter_equipment(self.get_queryset(), request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked prefix search on equipment names, e.g. ?q=HX-3"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            dataset_id = request.query_params.get('dataset')
+            dataset_id = int(dataset_id) if dataset_id else None
+            limit = min(int(request.query_params.get('limit', 50)), 500)
+        except ValueError:
+            return Response({'error': 'dataset and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'error': 'limit must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = search_equipment(query, dataset_id=dataset_id, limit=limit)
+        serializer = self.get_serializer(results, many=True)
+        return Response(serializer.data)
 
 
 @api_view(['POST'])
+@authentication_classes([])  # A stale token header must not block getting a new one
 @permission_classes([AllowAny])
 def register_user(request):
     """Register a new user"""
@@ -249,6 +292,7 @@ def register_user(request):
 
 
 @api_view(['POST'])
+@authentication_classes([])
 @permission_classes([AllowAny])
 def login_user(request):
     """Login user"""
@@ -257,6 +301,23 @@ def login_user(request):
     
     user = authenticate(username=username, password=password)
     if user:
-        return Response({'message': 'Login successful', 'username': username}, status=status.HTTP_200_OK)
+        token = issue_token(user)
+        return Response({'message': 'Login successful', 'username': username, 'token': token},
+                        status=status.HTTP_200_OK)
     else:
         return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout_user(request):
+    """Revoke the token used for this request"""
+    if isinstance(request.successful_authenticator, TokenAuthentication):
+        revoke_token(request.auth)
+    return Response({'message': 'Logout successful'}, status=status.HTTP_200_OK)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    body, content_type = metrics.render()
+    return HttpResponse(body, content_type=content_type)
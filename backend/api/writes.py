@@ -0,0 +1,38 @@
+import random
+import threading
+import time
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+
+# Write transactions from this process queue here rather than polling SQLite's lock
+_writer = threading.RLock()
+
+
+def database_locked(error):
+    """Whether error is SQLite reporting that another connection holds the lock"""
+    return isinstance(error, OperationalError) and 'locked' in str(error)
+
+
+def write_transaction(func, *args, **kwargs):
+    """Run func(*args, **kwargs) in one write transaction and return its result.
+
+    Writers in a process take turns; across processes the transaction begins
+    IMMEDIATE and waits for SQLite's write lock (see config/sqlite3). If the
+    lock is still held after the busy timeout the whole transaction is run
+    again, up to WRITE_RETRIES times with jittered exponential backoff, so
+    func must only have database side effects. Inside an existing transaction
+    func simply runs in a savepoint.
+    """
+    if connection.in_atomic_block:
+        with transaction.atomic():
+            return func(*args, **kwargs)
+
+    for attempt in range(settings.WRITE_RETRIES + 1):
+        try:
+            with _writer, transaction.atomic():
+                return func(*args, **kwargs)
+        except OperationalError as e:
+            if not database_locked(e) or attempt == settings.WRITE_RETRIES:
+                raise
+        time.sleep(settings.WRITE_RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1))
@@ -0,0 +1,219 @@
+"""
+Concurrency load test comparing the WSGI and ASGI deployments.
+
+Starts gunicorn (config.wsgi, sync workers) and uvicorn (config.asgi, async
+views) one after the other on localhost, each against its own throwaway SQLite
+database seeded with a synthetic CSV, and fires each scenario from N client
+threads. Reports throughput and latency percentiles per server.
+
+Usage:
+    pip install gunicorn uvicorn
+    python benchmarks/load_test.py --rows 20000 --concurrency 1 8 32 --workers 2
+
+The 'reads_during_uploads' scenario mixes uploads with history reads and
+reports the read latency separately; it shows whether slow requests starve
+fast ones.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.synthetic import generate_csv  # noqa: E402
+
+
+SERVERS = {
+    'wsgi': [sys.executable, '-m', 'gunicorn', 'config.wsgi:application',
+             '--bind', '127.0.0.1:{port}', '--workers', '{workers}', '--timeout', '300'],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'config.asgi:application',
+             '--port', '{port}', '--workers', '{workers}', '--log-level', 'warning'],
+}
+
+
+def multipart(path):
+    """Encode a file as a multipart/form-data body, returning (body, content type)"""
+    boundary = uuid.uuid4().hex
+    with open(path, 'rb') as f:
+        content = f.read()
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{os.path.basename(path)}"\r\n'
+        'Content-Type: text/csv\r\n\r\n'
+    ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+def request(url, data=None, content_type=None):
+    """Perform one request and return (status, seconds); the body is read fully"""
+    req = urllib.request.Request(url, data=data, headers={'Accept': 'application/json'})
+    if content_type:
+        req.add_header('Content-Type', content_type)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=300) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    except (urllib.error.URLError, ConnectionError):
+        status = None
+    return status, time.perf_counter() - start
+
+
+class Server:
+    """One server process bound to a fresh database"""
+    def __init__(self, kind, port, workers, tmp):
+        self.kind = kind
+        self.base = f'http://127.0.0.1:{port}'
+        self.env = {**os.environ, 'DJANGO_DB_PATH': os.path.join(tmp, f'{kind}.sqlite3')}
+        self.env.pop('DJANGO_ASYNC_VIEWS', None)  # config.asgi turns it on by itself
+        self.command = [part.format(port=port, workers=workers) for part in SERVERS[kind]]
+        self.process = None
+
+    def __enter__(self):
+        subprocess.run([sys.executable, 'manage.py', 'migrate', '-v', '0'],
+                       cwd=BACKEND_DIR, env=self.env, check=True)
+        self.process = subprocess.Popen(self.command, cwd=BACKEND_DIR, env=self.env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 30
+        while request(self.base + '/api/datasets/history/')[0] != 200:
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f'{self.kind} server did not start: {" ".join(self.command)}')
+            time.sleep(0.2)
+        return self
+
+    def upload(self, path):
+        """Upload a CSV and return the new dataset id"""
+        body, content_type = multipart(path)
+        req = urllib.request.Request(self.base + '/api/datasets/upload/', data=body,
+                                     headers={'Content-Type': content_type})
+        with urllib.request.urlopen(req, timeout=300) as response:
+            return json.load(response)['id']
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+
+def run_scenario(calls, concurrency, total):
+    """Issue `total` calls from `concurrency` threads.
+
+    calls(i) returns (label, status, seconds) for the i-th request.
+    Returns ({label: [seconds]}, errors, wall seconds).
+    """
+    latencies = {}
+    errors = 0
+    lock = threading.Lock()
+
+    def work(i):
+        nonlocal errors
+        label, status, seconds = calls(i)
+        with lock:
+            if status is None or status >= 400:
+                errors += 1
+            else:
+                latencies.setdefault(label, []).append(seconds)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(work, range(total)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def scenarios(server, dataset_id, upload_body):
+    """Scenario name -> calls(i) returning (label, status, seconds)"""
+    body, content_type = upload_body
+
+    def get(label, path):
+        return lambda i: (label, *request(server.base + path))
+
+    def reads_during_uploads(i):
+        if i % 4 == 0:
+            return ('upload', *request(server.base + '/api/datasets/upload/', body, content_type))
+        return ('history', *request(server.base + '/api/datasets/history/'))
+
+    return {
+        'history': get('history', '/api/datasets/history/'),
+        'retrieve': get('retrieve', f'/api/datasets/{dataset_id}/'),
+        'equipment': get('equipment', f'/api/equipment/?dataset={dataset_id}&min_pressure=30&limit=100'),
+        'generate_pdf': get('generate_pdf', f'/api/datasets/{dataset_id}/generate_pdf/'),
+        # Last, as uploads prune older datasets
+        'reads_during_uploads': reads_during_uploads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare WSGI and ASGI throughput under concurrent load')
+    parser.add_argument('--rows', type=int, default=20000, help='rows in the seeded dataset')
+    parser.add_argument('--upload-rows', type=int, default=2000, help='rows per upload in the mixed scenario')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=64, help='requests per scenario and concurrency level')
+    parser.add_argument('--workers', type=int, default=2, help='server worker processes')
+    parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument('--scenarios', nargs='+', help='only run these scenarios')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--save', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_csv = generate_csv(os.path.join(tmp, 'seed.csv'), args.rows)
+        upload_body = multipart(generate_csv(os.path.join(tmp, 'upload.csv'), args.upload_rows, seed=7))
+        for kind in args.servers:
+            print(f'Starting {kind} server...', file=sys.stderr)
+            with Server(kind, args.port, args.workers, tmp) as server:
+                dataset_id = server.upload(seed_csv)
+
+                for name, calls in scenarios(server, dataset_id, upload_body).items():
+                    if args.scenarios and name not in args.scenarios:
+                        continue
+                    for concurrency in args.concurrency:
+                        latencies, errors, wall = run_scenario(calls, concurrency, args.requests)
+                        for label, values in latencies.items():
+                            results.append({
+                                'server': kind,
+                                'scenario': name,
+                                'request': label,
+                                'concurrency': concurrency,
+                                'requests': len(values),
+                                'errors': errors,
+                                'rps': len(values) / wall,
+                                'p50': statistics.median(values),
+                                'p95': percentile(values, 0.95),
+                                'max': max(values),
+                            })
+
+    print(f'{"scenario":<22} {"request":<13} {"conc":>4} {"server":<6} '
+          f'{"req/s":>8} {"p50 ms":>9} {"p95 ms":>9} {"max ms":>9} {"errors":>6}')
+    for row in sorted(results, key=lambda r: (r['scenario'], r['request'], r['concurrency'], r['server'])):
+        print(f'{row["scenario"]:<22} {row["request"]:<13} {row["concurrency"]:>4} {row["server"]:<6} '
+              f'{row["rps"]:>8.1f} {row["p50"] * 1000:>9.1f} {row["p95"] * 1000:>9.1f} '
+              f'{row["max"] * 1000:>9.1f} {row["errors"]:>6}')
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'workers': args.workers, 'rows': args.rows, 'results': results}, f, indent=2)
+        print(f'Saved results to {args.save}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
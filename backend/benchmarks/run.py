@@ -0,0 +1,175 @@
+"""
+End-to-end API benchmarks against the Django test client.
+
+Runs each endpoint against a throwaway test database seeded with synthetic
+CSVs (see synthetic.py) and reports median timings.
+
+Usage:
+    python benchmarks/run.py --rows 1000 100000 --save benchmarks/baseline.json
+    python benchmarks/run.py --rows 1000 100000 --compare benchmarks/baseline.json --threshold 0.25
+
+In compare mode the exit status is 1 when any benchmark's median is slower
+than the baseline median by more than the threshold fraction.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment, setup_databases, teardown_databases  # noqa: E402
+from benchmarks.synthetic import generate_csv  # noqa: E402
+
+
+def timed(fn, repeat):
+    """Run fn `repeat` times, returning (timings, last result)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def check(response, expected=200):
+    if response.status_code != expected:
+        raise RuntimeError(f'{response.request["PATH_INFO"]} returned {response.status_code}')
+    return response
+
+
+def run_suite(client, csv_path, rows, repeat):
+    """Benchmark every endpoint for one dataset size"""
+    results = {}
+
+    def upload():
+        with open(csv_path, 'rb') as f:
+            return check(client.post('/api/datasets/upload/', {'file': f}), 201)
+
+    timings, response = timed(upload, repeat)
+    results[f'upload/rows={rows}'] = timings
+    dataset_id = response.json()['id']
+    if repeat < 2:
+        upload()  # compare needs at least two datasets
+    ids = ','.join(str(ds['id']) for ds in check(client.get('/api/datasets/history/')).json())
+
+    endpoints = {
+        'retrieve': f'/api/datasets/{dataset_id}/',
+        'history': '/api/datasets/history/',
+        'generate_pdf': f'/api/datasets/{dataset_id}/generate_pdf/',
+        'compare': f'/api/datasets/compare/?ids={ids}',
+        'trend': '/api/datasets/trend/',
+        'equipment_filter': f'/api/equipment/?dataset={dataset_id}&min_pressure=30&ordering=-pressure&limit=100',
+        'equipment_search': f'/api/equipment/search/?q=Pump&dataset={dataset_id}',
+    }
+    for name, url in endpoints.items():
+        def request(url=url):
+            response = check(client.get(url))
+            if response.streaming:
+                b''.join(response.streaming_content)
+            return response
+        results[f'{name}/rows={rows}'], _ = timed(request, repeat)
+    return results
+
+
+def summarize(results):
+    return {
+        name: {
+            'median': statistics.median(timings),
+            'min': min(timings),
+            'max': max(timings),
+            'runs': len(timings),
+        }
+        for name, timings in results.items()
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print a comparison table and return the names of regressed benchmarks"""
+    regressions = []
+    print(f'{"benchmark":<40} {"baseline":>10} {"current":>10} {"change":>8}')
+    for name, stats in current.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f'{name:<40} {"-":>10} {stats["median"]:>10.4f} {"new":>8}')
+            continue
+        change = stats['median'] / base['median'] - 1 if base['median'] else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f'{name:<40} {base["median"]:>10.4f} {stats["median"]:>10.4f} {change:>+8.1%}{flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the equipment API')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000],
+                        help='dataset sizes to benchmark (1k to 10M)')
+    parser.add_argument('--types', type=int, default=8, help='number of distinct equipment types')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', help='write results to this JSON baseline file')
+    parser.add_argument('--compare', help='compare results against this JSON baseline file')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed slowdown before flagging a regression (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    setup_test_environment(debug=False)
+    old_config = setup_databases(verbosity=0, interactive=False)
+    results = {}
+    try:
+        client = Client()
+        with tempfile.TemporaryDirectory() as tmp:
+            for rows in args.rows:
+                csv_path = generate_csv(os.path.join(tmp, f'equipment_{rows}.csv'), rows, args.types, args.seed)
+                print(f'Benchmarking {rows} rows...', file=sys.stderr)
+                results.update(run_suite(client, csv_path, rows, args.repeat))
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+    summary = summarize(results)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'machine': platform.machine(),
+            'types': args.types,
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': summary,
+    }
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Saved baseline to {args.save}', file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(summary, baseline, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regression(s) beyond {args.threshold:.0%}: {", ".join(regressions)}')
+            sys.exit(1)
+    else:
+        for name, stats in summary.items():
+            print(f'{name:<40} median {stats["median"]:.4f}s  min {stats["min"]:.4f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Concurrent upload stress test.
+
+Starts each server from load_test.py against a throwaway SQLite database and
+fires N uploads of distinct synthetic CSVs at once, while reader threads poll
+the dataset history. Then it checks the database file directly:
+
+- every upload returned 201 with all of its rows accepted
+- each remaining dataset has exactly total_count equipment rows, whose
+  sums match both the stored running sums and the CSV it was uploaded from
+- pruning kept the newest datasets and left no orphaned equipment rows
+- PRAGMA integrity_check passes
+
+Exits non-zero when any check fails.
+
+Usage:
+    python benchmarks/stress_uploads.py --uploads 16 --rows 5000 --workers 4
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.load_test import SERVERS, Server, multipart, percentile, request  # noqa: E402
+from benchmarks.synthetic import generate_csv  # noqa: E402
+
+
+PARAMETERS = ['flowrate', 'pressure', 'temperature']
+
+
+def csv_sums(path):
+    """(row count, {parameter: sum}) of a synthetic CSV"""
+    sums = dict.fromkeys(PARAMETERS, 0.0)
+    rows = 0
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            rows += 1
+            for param in PARAMETERS:
+                sums[param] += float(row[param.capitalize()])
+    return rows, sums
+
+
+def upload(server, path):
+    """POST one CSV, returning (status, response dict or None, seconds)"""
+    body, content_type = multipart(path)
+    req = urllib.request.Request(server.base + '/api/datasets/upload/', data=body,
+                                 headers={'Content-Type': content_type, 'Accept': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=300) as response:
+            return response.status, json.load(response), time.perf_counter() - start
+    except urllib.error.HTTPError as e:
+        try:
+            data = json.load(e)
+        except ValueError:
+            data = None
+        return e.code, data, time.perf_counter() - start
+
+
+def check_database(db_path, sources, responses):
+    """Compare the stored datasets against their source CSVs; returns a list of failures"""
+    failures = []
+    connection = sqlite3.connect(db_path)
+    try:
+        integrity = connection.execute('PRAGMA integrity_check').fetchone()[0]
+        if integrity != 'ok':
+            failures.append(f'integrity_check: {integrity}')
+
+        datasets = {
+            row[0]: row[1:] for row in connection.execute(
+                'SELECT id, filename, total_count, sum_flowrate, sum_pressure, sum_temperature FROM api_dataset'
+            )
+        }
+        equipment = {
+            row[0]: row[1:] for row in connection.execute(
+                'SELECT dataset_id, COUNT(*), SUM(flowrate), SUM(pressure), SUM(temperature) '
+                'FROM api_equipment GROUP BY dataset_id'
+            )
+        }
+    finally:
+        connection.close()
+
+    orphans = set(equipment) - set(datasets)
+    if orphans:
+        failures.append(f'equipment rows left for deleted datasets {sorted(orphans)}')
+
+    uploaded = sorted(data['id'] for data in responses)
+    if sorted(datasets) != uploaded[len(uploaded) - len(datasets):]:
+        failures.append(f'kept datasets {sorted(datasets)} are not the newest of {uploaded}')
+
+    for dataset_id, (filename, total_count, *stored_sums) in datasets.items():
+        rows, sums = sources[filename]
+        count, *row_sums = equipment.get(dataset_id, (0, 0.0, 0.0, 0.0))
+        if not total_count == count == rows:
+            failures.append(f'{filename}: {rows} CSV rows, total_count {total_count}, {count} equipment rows')
+        for param, expected, stored, actual in zip(PARAMETERS, sums.values(), stored_sums, row_sums):
+            if not (math.isclose(expected, stored, rel_tol=1e-9) and math.isclose(expected, actual, rel_tol=1e-9)):
+                failures.append(f'{filename}: {param} sum {expected} in CSV, {stored} stored, {actual} in rows')
+    return failures
+
+
+def stress(server, paths, readers):
+    """Upload every path at once while `readers` threads read history.
+
+    Returns (upload results, read latencies, read errors).
+    """
+    done = threading.Event()
+    latencies = []
+    read_errors = 0
+    lock = threading.Lock()
+
+    def read():
+        nonlocal read_errors
+        while not done.is_set():
+            status, seconds = request(server.base + '/api/datasets/history/')
+            with lock:
+                if status == 200:
+                    latencies.append(seconds)
+                else:
+                    read_errors += 1
+
+    with ThreadPoolExecutor(max_workers=readers) as reader_pool:
+        for _ in range(readers):
+            reader_pool.submit(read)
+        with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+            results = list(pool.map(lambda path: upload(server, path), paths))
+        done.set()
+    return results, latencies, read_errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fire concurrent uploads and verify every dataset lands intact')
+    parser.add_argument('--uploads', type=int, default=16, help='concurrent uploads')
+    parser.add_argument('--rows', type=int, default=5000, help='rows per uploaded CSV')
+    parser.add_argument('--readers', type=int, default=4, help='threads reading history during the uploads')
+    parser.add_argument('--workers', type=int, default=4, help='server worker processes')
+    parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [generate_csv(os.path.join(tmp, f'upload-{i}.csv'), args.rows, seed=i) for i in range(args.uploads)]
+        sources = {os.path.basename(path): csv_sums(path) for path in paths}
+
+        for kind in args.servers:
+            print(f'Starting {kind} server...', file=sys.stderr)
+            with Server(kind, args.port, args.workers, tmp) as server:
+                results, latencies, read_errors = stress(server, paths, args.readers)
+
+            failures = [
+                f'upload {i}: HTTP {status} {data}'
+                for i, (status, data, _) in enumerate(results)
+                if status != 201 or data['validation']['rejected']
+            ]
+            responses = [data for status, data, _ in results if status == 201]
+            failures += check_database(server.env['DJANGO_DB_PATH'], sources, responses)
+            if read_errors:
+                failures.append(f'{read_errors} history reads failed')
+
+            upload_seconds = [seconds for _, _, seconds in results]
+            print(f'{kind}: {len(responses)}/{len(results)} uploads ok, '
+                  f'upload p50 {statistics.median(upload_seconds) * 1000:.0f} ms '
+                  f'max {max(upload_seconds) * 1000:.0f} ms; '
+                  f'{len(latencies)} reads, p50 {statistics.median(latencies) * 1000:.1f} ms '
+                  f'p95 {percentile(latencies, 0.95) * 1000:.1f} ms max {max(latencies) * 1000:.1f} ms')
+            for failure in failures:
+                print(f'  FAIL {failure}')
+            failed = failed or bool(failures)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
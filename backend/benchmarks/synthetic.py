@@ -0,0 +1,64 @@
+"""
+Deterministic synthetic equipment CSV generator for benchmarks.
+
+Usage:
+    python benchmarks/synthetic.py out.csv --rows 1000000 --types 12 --seed 42
+"""
+import argparse
+import numpy as np
+
+
+BASE_TYPES = [
+    'Pump', 'Compressor', 'Valve', 'Reactor', 'Heat Exchanger', 'Column',
+    'Condenser', 'Mixer', 'Separator', 'Boiler', 'Crystallizer', 'Dryer',
+]
+HEADER = 'Equipment Name,Type,Flowrate,Pressure,Temperature\n'
+CHUNK_SIZE = 250_000
+
+
+def type_names(n_types):
+    """First n type names, suffixed once the base list runs out"""
+    return [
+        BASE_TYPES[i % len(BASE_TYPES)] + (f' {i // len(BASE_TYPES)}' if i >= len(BASE_TYPES) else '')
+        for i in range(n_types)
+    ]
+
+
+def generate_csv(path, rows, n_types=8, seed=42):
+    """Write `rows` equipment records to `path` in fixed-size chunks.
+
+    The same (rows, n_types, seed) always produces byte-identical output and
+    memory use is bounded by CHUNK_SIZE regardless of `rows`.
+    """
+    rng = np.random.default_rng(seed)
+    types = np.array(type_names(n_types))
+    # Per-type parameter centres so per-type statistics are meaningful
+    centres = rng.uniform([50, 5, 40], [300, 60, 250], size=(n_types, 3))
+
+    with open(path, 'w', newline='') as f:
+        f.write(HEADER)
+        for start in range(0, rows, CHUNK_SIZE):
+            size = min(CHUNK_SIZE, rows - start)
+            codes = rng.integers(0, n_types, size=size)
+            values = rng.normal(centres[codes], centres[codes] * 0.1)
+            names = [f'{types[code]}-{start + i}' for i, code in enumerate(codes)]
+            lines = [
+                f'{name},{types[code]},{v[0]:.2f},{v[1]:.2f},{v[2]:.2f}\n'
+                for name, code, v in zip(names, codes, values)
+            ]
+            f.writelines(lines)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic equipment CSV')
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--types', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    generate_csv(args.path, args.rows, args.types, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+"""
+ASGI config for config project.
+
+Serves the async read, streaming and upload views in api/async_views.py, e.g.
+    uvicorn config.asgi:application --workers 4
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('DJANGO_ASYNC_VIEWS', '1')
+
+application = get_asgi_application()
@@ -3,6 +3,7 @@ Django settings for config project.
 """
 
 from pathlib import Path
+from datetime import timedelta
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -30,6 +31,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -59,15 +61,29 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
+
+# Route reads, downloads and uploads to the async views (config/asgi.py turns this on)
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
 
 # Database
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': 'config.sqlite3',  # WAL mode and BEGIN IMMEDIATE, see config/sqlite3/base.py
+        'NAME': os.environ.get('DJANGO_DB_PATH', BASE_DIR / 'db.sqlite3'),
+        'OPTIONS': {
+            'timeout': 20,  # Seconds to wait for the write lock before "database is locked"
+        },
     }
 }
 
+# Write transactions that still find the database locked are retried WRITE_RETRIES
+# times, after WRITE_RETRY_BACKOFF seconds doubled on each attempt (api/writes.py)
+WRITE_RETRIES = 3
+WRITE_RETRY_BACKOFF = 0.5
+# Retry-After seconds sent with the 503 when the retries are used up
+WRITE_RETRY_AFTER = 5
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -98,13 +114,20 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Per-column overrides of api.schema.DEFAULT_SCHEMA (aliases, dtype, canonical unit), e.g.
+# {'Pressure': {'unit': 'kpa', 'dtype': 'float32'}}
+INGEST_SCHEMA = {}
+
+# Directory for cProfile dumps of uploads made with ?profile=1 (disabled when unset)
+INGEST_PROFILE_DIR = os.environ.get('INGEST_PROFILE_DIR')
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.BasicAuthentication',
+        'api.authentication.TokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -112,6 +135,11 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Token authentication: tokens expire after AUTH_TOKEN_MAX_AGE (None = never) and
+# validated tokens are cached in memory for AUTH_TOKEN_CACHE_TTL seconds
+AUTH_TOKEN_MAX_AGE = timedelta(days=30)
+AUTH_TOKEN_CACHE_TTL = 300
+
 # CORS Settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
@@ -0,0 +1,21 @@
+"""
+SQLite backend for concurrent requests.
+
+- The database runs in WAL journal mode, so readers see the last committed
+  state and never wait for a writer.
+- Transactions begin IMMEDIATE and take the write lock up front, waiting up
+  to OPTIONS['timeout'] seconds for it. A deferred transaction that has read
+  before its first write fails at once with "database is locked" when another
+  connection holds the lock, without waiting out the busy timeout.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        conn.execute('PRAGMA journal_mode = WAL')  # Persistent; in-memory databases ignore it
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
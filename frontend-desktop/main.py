@@ -18,6 +18,48 @@ import io
 API_URL = 'http://localhost:8000/api'
 
 
+class ApiClient:
+    """Shared HTTP session that sends the auth token on every call"""
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.session.hooks['response'].append(self._drop_rejected_token)
+        self.username = None
+    
+    def set_token(self, token, username=None):
+        self.session.headers['Authorization'] = f'Token {token}'
+        self.username = username
+    
+    def clear_token(self):
+        self.session.headers.pop('Authorization', None)
+        self.username = None
+    
+    def logout(self):
+        """Revoke the token on the server, then forget it"""
+        try:
+            self.post('/logout/')
+        finally:
+            self.clear_token()
+    
+    def _drop_rejected_token(self, response, *args, **kwargs):
+        # The server no longer accepts the token (expired or revoked)
+        if response.status_code == 401:
+            self.clear_token()
+    
+    @property
+    def logged_in(self):
+        return 'Authorization' in self.session.headers
+    
+    def get(self, path, **kwargs):
+        return self.session.get(f'{self.base_url}{path}', **kwargs)
+    
+    def post(self, path, **kwargs):
+        return self.session.post(f'{self.base_url}{path}', **kwargs)
+
+
+api = ApiClient(API_URL)
+
+
 class UploadThread(QThread):
     """Thread for uploading files to avoid blocking UI"""
     finished = pyqtSignal(dict)
@@ -31,7 +73,7 @@ class UploadThread(QThread):
         try:
             with open(self.filepath, 'rb') as f:
                 files = {'file': f}
-                response = requests.post(f'{API_URL}/datasets/upload/', files=files)
+                response = api.post('/datasets/upload/', files=files)
                 if response.status_code == 201:
                     self.finished.emit(response.json())
                 else:
@@ -84,9 +126,9 @@ class LoginDialog(QDialog):
             return
         
         try:
-            response = requests.post(f'{API_URL}/login/', 
-                                   json={'username': username, 'password': password})
+            response = api.post('/login/', json={'username': username, 'password': password})
             if response.status_code == 200:
+                api.set_token(response.json()['token'], username)
                 QMessageBox.information(self, 'Success', 'Login successful!')
                 self.accept()
             else:
@@ -103,8 +145,7 @@ class LoginDialog(QDialog):
             return
         
         try:
-            response = requests.post(f'{API_URL}/register/', 
-                                   json={'username': username, 'password': password})
+            response = api.post('/register/', json={'username': username, 'password': password})
             if response.status_code == 201:
                 QMessageBox.information(self, 'Success', 
                                       'Registration successful! Please login.')
@@ -183,10 +224,10 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(header)
         
         # Auth button
-        auth_btn = QPushButton('Login / Register')
-        auth_btn.clicked.connect(self.show_auth_dialog)
-        auth_btn.setMaximumWidth(150)
-        main_layout.addWidget(auth_btn, alignment=Qt.AlignRight)
+        self.auth_btn = QPushButton('Login / Register')
+        self.auth_btn.clicked.connect(self.show_auth_dialog)
+        self.auth_btn.setMaximumWidth(220)
+        main_layout.addWidget(self.auth_btn, alignment=Qt.AlignRight)
         
         # Upload section
         upload_group = QGroupBox('Upload CSV File')
@@ -283,9 +324,23 @@ class MainWindow(QMainWindow):
         return group
     
     def show_auth_dialog(self):
-        """Show login/register dialog"""
-        dialog = LoginDialog(self)
-        dialog.exec_()
+        """Show login/register dialog, or log out when logged in"""
+        if api.logged_in:
+            try:
+                api.logout()
+            except Exception as e:
+                QMessageBox.warning(self, 'Error', f'Logout failed: {str(e)}')
+        else:
+            dialog = LoginDialog(self)
+            dialog.exec_()
+        self.update_auth_button()
+    
+    def update_auth_button(self):
+        """Reflect the login state, which a rejected token can change"""
+        if api.logged_in:
+            self.auth_btn.setText(f'✓ {api.username} · Logout')
+        else:
+            self.auth_btn.setText('Login / Register')
     
     def browse_file(self):
         """Open file browser"""
@@ -311,6 +366,7 @@ class MainWindow(QMainWindow):
         """Handle successful upload"""
         self.current_data = data
         self.file_label.setText('Upload successful!')
+        self.update_auth_button()
         self.update_display()
         self.load_history()
         QMessageBox.information(self, 'Success', 'File uploaded and analyzed successfully!')
@@ -318,6 +374,7 @@ class MainWindow(QMainWindow):
     def on_upload_error(self, error_msg):
         """Handle upload error"""
         self.file_label.setText('Upload failed')
+        self.update_auth_button()
         QMessageBox.critical(self, 'Error', f'Upload failed: {error_msg}')
     
     def update_display(self):
@@ -360,7 +417,8 @@ class MainWindow(QMainWindow):
     def load_history(self):
         """Load upload history"""
         try:
-            response = requests.get(f'{API_URL}/datasets/history/')
+            response = api.get('/datasets/history/')
+            self.update_auth_button()
             if response.status_code == 200:
                 history = response.json()
                 self.history_table.setRowCount(len(history))
@@ -387,7 +445,8 @@ class MainWindow(QMainWindow):
     def load_dataset(self, dataset_id):
         """Load a specific dataset"""
         try:
-            response = requests.get(f'{API_URL}/datasets/{dataset_id}/')
+            response = api.get(f'/datasets/{dataset_id}/')
+            self.update_auth_button()
             if response.status_code == 200:
                 self.current_data = response.json()
                 self.update_display()
@@ -404,7 +463,7 @@ class MainWindow(QMainWindow):
         
         try:
             dataset_id = self.current_data['id']
-            response = requests.get(f'{API_URL}/datasets/{dataset_id}/generate_pdf/', stream=True)
+            response = api.get(f'/datasets/{dataset_id}/generate_pdf/', stream=True)
             
             if response.status_code == 200:
                 filename, _ = QFileDialog.getSaveFileName(
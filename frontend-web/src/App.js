@@ -8,6 +8,16 @@ ChartJS.register(CategoryScale, LinearScale, BarElement, Title, Tooltip, Legend,
 
 const API_URL = 'http://localhost:8000/api';
 
+const setAuthToken = (token) => {
+  if (token) {
+    axios.defaults.headers.common['Authorization'] = `Token ${token}`;
+    localStorage.setItem('authToken', token);
+  } else {
+    delete axios.defaults.headers.common['Authorization'];
+    localStorage.removeItem('authToken');
+  }
+};
+
 function App() {
   const [file, setFile] = useState(null);
   const [currentData, setCurrentData] = useState(null);
@@ -20,9 +30,29 @@ function App() {
   const [showAuth, setShowAuth] = useState(false);
 
   useEffect(() => {
+    const token = localStorage.getItem('authToken');
+    if (token) {
+      setAuthToken(token);
+      setIsLoggedIn(true);
+    }
     fetchHistory();
   }, []);
 
+  // Log out once the server rejects the stored token (expired or revoked)
+  useEffect(() => {
+    const interceptor = axios.interceptors.response.use(
+      (response) => response,
+      (error) => {
+        if (error.response?.status === 401) {
+          setAuthToken(null);
+          setIsLoggedIn(false);
+        }
+        return Promise.reject(error);
+      }
+    );
+    return () => axios.interceptors.response.eject(interceptor);
+  }, []);
+
   const fetchHistory = async () => {
     try {
       const response = await axios.get(`${API_URL}/datasets/history/`);
@@ -67,7 +97,8 @@ function App() {
   const handleLogin = async (e) => {
     e.preventDefault();
     try {
-      await axios.post(`${API_URL}/login/`, { username, password });
+      const response = await axios.post(`${API_URL}/login/`, { username, password });
+      setAuthToken(response.data.token);
       setIsLoggedIn(true);
       setShowAuth(false);
       setError(null);
@@ -76,6 +107,17 @@ function App() {
     }
   };
 
+  const handleLogout = async () => {
+    try {
+      await axios.post(`${API_URL}/logout/`);
+    } catch (err) {
+      console.error('Error logging out:', err);
+    } finally {
+      setAuthToken(null);
+      setIsLoggedIn(false);
+    }
+  };
+
   const handleRegister = async (e) => {
     e.preventDefault();
     try {
@@ -163,9 +205,9 @@ function App() {
         <h1>🧪 Chemical Equipment Parameter Visualizer</h1>
         <button 
           className="auth-btn"
-          onClick={() => setShowAuth(!showAuth)}
+          onClick={isLoggedIn ? handleLogout : () => setShowAuth(!showAuth)}
         >
-          {isLoggedIn ? '✓ Logged In' : 'Login / Register'}
+          {isLoggedIn ? '✓ Logged In · Logout' : 'Login / Register'}
         </button>
       </header>
 